@@ -0,0 +1,242 @@
+"""性能基准：对求解器和渲染器的热点路径计时，记录耗时、峰值内存和内存块分配
+
+用法：
+    python benchmarks/bench.py -o results.json                 # 运行并保存结果
+    python benchmarks/bench.py --save-baseline                 # 生成本机基线 benchmarks/baseline.json
+    python benchmarks/bench.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+基线与机器相关，不纳入版本库，需先在本机用 --save-baseline 生成。
+
+与基线比较时，任一项耗时超过基线 (1 + tolerance) 倍即视为退化，进程以状态码 1 退出。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from palletizing.solver import (  # noqa: E402
+    Box,
+    LayerGrid,
+    Pallet,
+    best_layout,
+    calculate_alternating_layout,
+    calculate_alternating_layout_original,
+    calculate_block_layout,
+    block_pattern,
+    fill_layer,
+    layer_sequence,
+)
+from palletizing.packing import _pack  # noqa: E402
+from palletizing.stability import analyze_stability  # noqa: E402
+from palletizing.viewer import viewer_html  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 固定的测试集：(名称, 箱子尺寸, 托盘尺寸)，从大托盘小箱子到接近托盘尺寸的大箱子
+CORPUS = [
+    ("tiny_on_large", (5, 7, 10), (240, 200, 200)),
+    ("small", (10, 12, 15), (120, 100, 180)),
+    ("default", (20, 35, 40), (120, 100, 200)),
+    ("euro_awkward", (27, 33, 21), (120, 80, 160)),
+    ("fractional", (30.5, 20, 15), (120, 80, 150)),
+    ("near_pallet", (110, 95, 60), (120, 100, 200)),
+]
+
+# 对已完成布局的后处理阶段（随每次求解运行）
+ANALYSIS_STAGES = {
+    "analyze_stability": lambda box, pallet, layout: analyze_stability(layout),
+    "viewer_html": lambda box, pallet, layout: viewer_html(pallet, layout),
+}
+
+# 渲染耗时随箱数增长，超过此箱数的用例跳过渲染阶段
+RENDER_LIMIT = 5000
+
+
+def _clear_caches():
+    """清除求解缓存，保证每次计时都是冷启动"""
+    layer_sequence.cache_clear()
+    block_pattern.cache_clear()
+    _pack.cache_clear()
+
+
+def _stage_place_box(box, pallet):
+    """填充第一层（主要开销在 place_box）"""
+    l, w, _ = box.get_rotations()[0]
+    fill_layer(l, w, pallet, 0, LayerGrid(pallet), {"box_positions": []})
+
+
+def _stage_improved(box, pallet):
+    _clear_caches()
+    best_layout(box, pallet, calculate_alternating_layout)
+
+
+def _stage_original(box, pallet):
+    best_layout(box, pallet, calculate_alternating_layout_original)
+
+
+def _stage_block(box, pallet):
+    _clear_caches()
+    best_layout(box, pallet, calculate_block_layout)
+
+
+SOLVER_STAGES = {
+    "place_box": _stage_place_box,
+    "calculate_alternating_layout": _stage_improved,
+    "calculate_alternating_layout_original": _stage_original,
+    "calculate_block_layout": _stage_block,
+}
+
+
+def _render_stages():
+    """渲染阶段依赖 matplotlib，不可用时返回 (空, 原因)"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from palletizing import plotting
+    except Exception as exc:  # 缺少 matplotlib 等
+        return {}, f"{type(exc).__name__}: {exc}"
+
+    from palletizing.export import ExportCache, export_layout, layout_fingerprint
+
+    def plot_3d(box, pallet, layout):
+        plt.close(plotting.plot_3d_layout(pallet, layout))
+
+    def render(box, pallet, layout):
+        # 页面显示3D视图的路径：绘图后经 render_figure 渲染为 PNG
+        plotting.figure_png(plotting.plot_3d_layout(pallet, layout))
+
+    def export(box, pallet, layout):
+        # 下载路径：计算布局指纹，缓存未命中时渲染 300 dpi PNG
+        export_layout(layout_fingerprint(pallet, layout), lambda: plotting.plot_3d_layout(pallet, layout),
+                      "png", cache=ExportCache())
+
+    return {"plot_3d_layout": plot_3d, "render_figure": render, "export_layout": export}, None
+
+
+def measure(func, repeat):
+    """运行 func：计时 repeat 次，另运行一次统计内存"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks_before
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_bytes": peak,
+        "allocated_blocks": blocks,
+    }
+
+
+def run(repeat=3, stages=None, cases=None):
+    """运行全部基准，返回结果 dict"""
+    render_stages, render_skip = _render_stages()
+    results = []
+    for name, box_dims, pallet_dims in CORPUS:
+        if cases and name not in cases:
+            continue
+        box, pallet = Box(*box_dims), Pallet(*pallet_dims)
+        for stage, func in SOLVER_STAGES.items():
+            if stages and stage not in stages:
+                continue
+            record = {"stage": stage, "case": name}
+            record.update(measure(lambda: func(box, pallet), repeat))
+            results.append(record)
+            print(f"{stage:40s} {name:15s} {record['min_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+        layout = best_layout(box, pallet, calculate_alternating_layout)
+        for stage, func in {**ANALYSIS_STAGES, **render_stages}.items():
+            if stages and stage not in stages:
+                continue
+            if layout is None or (stage in render_stages and layout["total_boxes"] > RENDER_LIMIT):
+                continue
+            record = {"stage": stage, "case": name}
+            record.update(measure(lambda: func(box, pallet, layout), repeat))
+            results.append(record)
+            print(f"{stage:40s} {name:15s} {record['min_s'] * 1000:10.2f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "render_skipped": render_skip,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """与基线逐项比较耗时，返回退化项列表"""
+    reference = {(r["stage"], r["case"]): r for r in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        base = reference.get((record["stage"], record["case"]))
+        if base is None:
+            continue
+        ratio = record["min_s"] / base["min_s"] if base["min_s"] else float("inf")
+        record["baseline_min_s"] = base["min_s"]
+        record["ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(record)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="求解器与渲染器性能基准")
+    parser.add_argument("-o", "--output", help="结果 JSON 输出路径")
+    parser.add_argument("--repeat", type=int, default=3, help="每项计时重复次数（取最小值）")
+    parser.add_argument("--stage", action="append", help="只运行指定阶段，可重复")
+    parser.add_argument("--case", action="append", help="只运行指定用例，可重复")
+    parser.add_argument("--baseline", help="与基线 JSON 比较")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的耗时增长比例")
+    parser.add_argument("--save-baseline", action="store_true", help=f"把结果保存为 {DEFAULT_BASELINE}")
+    args = parser.parse_args(argv)
+
+    current = run(args.repeat, args.stage, args.case)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        current["meta"]["regressions"] = len(regressions)
+        for record in regressions:
+            print(f"退化: {record['stage']} / {record['case']} "
+                  f"{record['baseline_min_s'] * 1000:.2f} ms -> {record['min_s'] * 1000:.2f} ms "
+                  f"(x{record['ratio']:.2f})", file=sys.stderr)
+
+    outputs = [args.output] if args.output else []
+    if args.save_baseline:
+        outputs.append(DEFAULT_BASELINE)
+    for path in outputs:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+    if not outputs:
+        json.dump(current, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
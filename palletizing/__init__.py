@@ -0,0 +1,26 @@
+"""纵横式堆码求解包
+
+核心求解模块只依赖 numpy，可在批处理、子进程和测试中直接导入，
+不会加载 streamlit、matplotlib 或字体；绘图函数在 palletizing.plotting 中，需要时再导入。
+"""
+from .solver import (
+    SOLVERS,
+    Box,
+    LayerGrid,
+    Pallet,
+    best_layout,
+    calculate_alternating_layout,
+    calculate_alternating_layout_original,
+    calculate_block_layout,
+    place_box,
+)
+from .batch import solve_batch
+from .cache import LayoutCache, default_cache
+from .layout import Layout
+from .mixed import Item, calculate_mixed_layout
+from .packing import PACKERS, pack_layer
+from .planning import plan_order
+from .stability import analyze_stability
+from .store import SolutionStore, build_store
+from .trace import Trace
+from .viewer import viewer_html
@@ -0,0 +1,216 @@
+"""命令行入口：
+
+    python -m palletizing solve catalog.csv -o results.jsonl
+    python -m palletizing plan --box 20 35 40 --pallet 120 100 200 --quantity 50000 --truck 1360 245
+    python -m palletizing view --box 20 35 40 --pallet 120 100 200 -o view.html
+    python -m palletizing build store.db --boxes catalog.csv -j 0
+    python -m palletizing query store.db --pallet 120 100 200 --min-utilization 0.9
+"""
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+
+from .batch import read_rows, solve_batch, write_jsonl, write_parquet
+from .cache import LayoutCache
+from .parallel import default_workers
+from .planning import plan_order, plan_summary
+from .solver import SOLVERS, Box, Pallet, best_layout
+from .store import STANDARD_PALLETS, SolutionStore, build_store, grid_boxes, read_boxes
+from .trace import PROFILERS, Trace
+from .viewer import viewer_html
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="palletize", description="纵横式堆码批量求解")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    solve = commands.add_parser("solve", help="批量求解箱子-托盘清单")
+    solve.add_argument("input", help="输入文件（.csv 或 .jsonl）")
+    solve.add_argument("-o", "--output", help="输出文件，默认写到标准输出（JSONL）")
+    solve.add_argument("--format", choices=("jsonl", "parquet"),
+                       help="输出格式，默认按输出文件扩展名判断")
+    solve.add_argument("--algorithm", action="append", choices=tuple(SOLVERS),
+                       help="参与求解的算法，可重复指定，默认全部")
+    solve.add_argument("--details", action="store_true", help="输出每层的箱子坐标明细")
+    solve.add_argument("-j", "--workers", type=int, default=1,
+                       help="并行进程数，0 表示使用全部 CPU（默认 1，即单进程）")
+    solve.add_argument("--chunksize", type=int, help="每次分发给子进程的任务数")
+    solve.add_argument("--cache", help="SQLite 磁盘缓存路径，跨次运行复用求解结果")
+    solve.add_argument("--trace", help="把分阶段耗时追踪写入该 JSON 文件")
+    solve.add_argument("--profile", choices=PROFILERS, help="对整次运行做性能剖析，报告输出到标准错误")
+
+    plan = commands.add_parser("plan", help="把订单数量拆分到多个托盘，逐个托盘输出 JSONL")
+    plan.add_argument("--box", type=float, nargs=3, required=True, metavar=("L", "W", "H"), help="箱子尺寸")
+    plan.add_argument("--pallet", type=float, nargs=3, required=True, metavar=("L", "W", "H"),
+                      help="托盘长、宽和最大堆高")
+    plan.add_argument("--quantity", type=int, required=True, help="订单箱数")
+    plan.add_argument("--truck", type=float, nargs=2, metavar=("L", "W"), help="卡车底板长、宽")
+    plan.add_argument("--algorithm", action="append", choices=tuple(SOLVERS),
+                      help="满托盘可选用的算法，可重复指定，默认 improved 和 block")
+    plan.add_argument("-o", "--output", help="输出文件，默认写到标准输出")
+
+    view = commands.add_parser("view", help="生成可离线打开的交互式 3D 视图（HTML）")
+    view.add_argument("--box", type=float, nargs=3, required=True, metavar=("L", "W", "H"), help="箱子尺寸")
+    view.add_argument("--pallet", type=float, nargs=3, required=True, metavar=("L", "W", "H"),
+                      help="托盘长、宽和最大堆高")
+    view.add_argument("--algorithm", action="append", choices=tuple(SOLVERS),
+                      help="参与比较的算法，可重复指定，默认 improved 和 block（取箱数较多者）")
+    view.add_argument("-o", "--output", required=True, help="输出的 HTML 文件")
+
+    build = commands.add_parser("build", help="离线预计算方案库（SQLite），已收录的组合跳过")
+    build.add_argument("store", help="方案库路径")
+    build.add_argument("--boxes", help="箱子清单（.csv 或 .jsonl，列 box_l, box_w, box_h）")
+    build.add_argument("--grid", type=float, nargs=3, metavar=("MIN", "MAX", "STEP"),
+                       help="另外收录各边在 [MIN, MAX] 内按 STEP 取值的全部箱子")
+    build.add_argument("--pallet", type=float, nargs=3, action="append", metavar=("L", "W", "H"),
+                       help="托盘长、宽和最大堆高，可重复指定，默认 120×100、120×80、110×110（堆高 200）")
+    build.add_argument("--algorithm", action="append", choices=tuple(SOLVERS),
+                       help="收录的算法，可重复指定，默认全部")
+    build.add_argument("-j", "--workers", type=int, default=1,
+                       help="并行进程数，0 表示使用全部 CPU（默认 1，即单进程）")
+    build.add_argument("--chunksize", type=int, help="每次分发给子进程的任务数")
+    build.add_argument("--trace", help="把分阶段耗时追踪写入该 JSON 文件")
+
+    query = commands.add_parser("query", help="按托盘和利用率/箱数范围查询方案库，逐行输出 JSONL")
+    query.add_argument("store", help="方案库路径")
+    query.add_argument("--pallet", type=float, nargs=3, required=True, metavar=("L", "W", "H"),
+                       help="托盘长、宽和最大堆高")
+    query.add_argument("--min-utilization", type=float, help="最低空间利用率（0~1）")
+    query.add_argument("--max-utilization", type=float, help="最高空间利用率（0~1）")
+    query.add_argument("--min-boxes", type=int, help="最少箱数")
+    query.add_argument("--max-boxes", type=int, help="最多箱数")
+    query.add_argument("--algorithm", action="append", choices=tuple(SOLVERS),
+                       help="参与比较的算法，可重复指定，默认 improved 和 block")
+    query.add_argument("--all-algorithms", action="store_true",
+                       help="每种算法各输出一行，默认每种箱子只输出箱数最多的算法")
+    query.add_argument("--limit", type=int, help="最多输出的行数")
+    query.add_argument("-o", "--output", help="输出文件，默认写到标准输出")
+    return parser
+
+
+def _dims(values):
+    """命令行尺寸参数，整数保持为 int（输出与输入格式一致），须为正数"""
+    if not all(0 < v < float("inf") for v in values):
+        raise SystemExit(f"尺寸必须为正数: {' '.join(f'{v:g}' for v in values)}")
+    return [int(v) if float(v).is_integer() else v for v in values]
+
+
+def _write_plans(plans, out):
+    """逐个托盘写出 JSONL（不含布局），再原样返回计划，供 plan_summary 汇总"""
+    for plan in plans:
+        record = {key: value for key, value in plan.items() if key != "layout"}
+        record["orientation"] = list(plan["layout"]["orientation"])
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        yield plan
+
+
+def run_plan(args):
+    algorithms = tuple(args.algorithm or ("improved", "block"))
+    plans = plan_order(Box(*_dims(args.box)), Pallet(*_dims(args.pallet)), args.quantity, algorithms,
+                       truck=_dims(args.truck) if args.truck else None)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = plan_summary(_write_plans(plans, out))
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"共 {summary['pallets']} 个托盘（满托盘 {summary['full_pallets']} 个，{summary['boxes']} 箱）"
+          + (f"，{summary['trucks']} 辆卡车" if summary["trucks"] else ""), file=sys.stderr)
+
+
+def run_view(args):
+    box, pallet = Box(*_dims(args.box)), Pallet(*_dims(args.pallet))
+    # 箱数相同时取先列出的算法
+    layouts = [best_layout(box, pallet, SOLVERS[name]) for name in args.algorithm or ("improved", "block")]
+    layout = max((layout for layout in layouts if layout), key=lambda layout: layout["total_boxes"], default=None)
+    if layout is None:
+        raise SystemExit("未找到可行方案，请调整尺寸参数")
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(viewer_html(pallet, layout))
+    print(f"{layout['type']}：{layout['total_boxes']} 箱，{layout['layers']} 层", file=sys.stderr)
+
+
+def run_build(args):
+    if not args.boxes and not args.grid:
+        raise SystemExit("需要指定 --boxes 或 --grid")
+    pallets = [Pallet(*_dims(p)) for p in args.pallet] if args.pallet else STANDARD_PALLETS
+    boxes = list(read_boxes(args.boxes)) if args.boxes else []
+    if args.grid:
+        boxes += grid_boxes(*_dims(args.grid))
+    trace = Trace("palletize build") if args.trace else None
+    store = SolutionStore(args.store)
+    try:
+        written = build_store(store, boxes, pallets, tuple(args.algorithm or SOLVERS),
+                              args.workers or default_workers(), args.chunksize, trace=trace)
+        print(f"新写入 {written} 条，方案库收录: {store.stats()}", file=sys.stderr)
+    finally:
+        store.close()
+    if trace is not None:
+        with open(args.trace, "w", encoding="utf-8") as f:
+            f.write(trace.to_json())
+
+
+def run_query(args):
+    store = SolutionStore(args.store)
+    try:
+        rows = store.query(Pallet(*_dims(args.pallet)), args.min_utilization, args.max_utilization,
+                           args.min_boxes, args.max_boxes, tuple(args.algorithm or ("improved", "block")),
+                           best=not args.all_algorithms, limit=args.limit)
+    finally:
+        store.close()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        count = write_jsonl(rows, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"共 {count} 行", file=sys.stderr)
+
+
+def run_solve(args):
+    algorithms = tuple(args.algorithm or SOLVERS)
+    workers = args.workers or default_workers()
+    cache = LayoutCache(path=args.cache)
+    trace = Trace("palletize solve", profile=args.profile) if args.trace or args.profile else None
+    records = solve_batch(read_rows(args.input), algorithms, args.details, workers, args.chunksize,
+                          cache=cache, trace=trace)
+    fmt = args.format or ("parquet" if args.output and args.output.endswith(".parquet") else "jsonl")
+    if fmt == "parquet" and not args.output:
+        raise SystemExit("Parquet 输出需要指定 --output")
+    with trace.profiled() if trace else nullcontext():
+        if fmt == "parquet":
+            count = write_parquet(records, args.output)
+        elif args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                count = write_jsonl(records, f)
+        else:
+            count = write_jsonl(records, sys.stdout)
+    print(f"已求解 {count} 行，缓存统计: {cache.stats()}", file=sys.stderr)
+    if trace is not None:
+        if args.trace:
+            with open(args.trace, "w", encoding="utf-8") as f:
+                f.write(trace.to_json())
+        if trace.profile_report:
+            print(trace.profile_report, file=sys.stderr)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "solve":
+        run_solve(args)
+    elif args.command == "plan":
+        run_plan(args)
+    elif args.command == "view":
+        run_view(args)
+    elif args.command == "build":
+        run_build(args)
+    elif args.command == "query":
+        run_query(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""批量（无界面）求解：读取 CSV / JSONL 的箱子-托盘清单，逐行输出最优方案
+
+输入每行需包含 box_l, box_w, box_h, pallet_l, pallet_w, pallet_h 六列，
+可选 id 列用于标识 SKU。结果以 JSONL 或 Parquet 流式写出。
+"""
+import csv
+import json
+
+from .cache import MISSING, canonical_box, canonical_key
+from .parallel import ParallelSolver
+from .solver import SOLVERS, Box, Pallet, best_layout
+from .trace import span
+
+BOX_FIELDS = ("box_l", "box_w", "box_h")
+PALLET_FIELDS = ("pallet_l", "pallet_w", "pallet_h")
+
+
+def _number(value):
+    """把输入值转换为数字，整数尺寸保持为 int（输出与输入格式一致）"""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _size(value):
+    """尺寸必须为有限正数（零或负尺寸会导致求解器除零或死循环）"""
+    number = _number(value)
+    if not 0 < number < float("inf"):
+        raise ValueError(f"尺寸必须为正数: {value!r}")
+    return number
+
+
+def read_rows(path):
+    """按扩展名读取 CSV 或 JSONL 文件，逐行返回 dict"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if str(path).endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def summarize(result, details=False):
+    """把求解结果压缩为可序列化的摘要"""
+    if result is None:
+        return None
+    summary = {
+        "orientation": list(result["orientation"]),
+        "total_boxes": result["total_boxes"],
+        "layers": result["layers"],
+        "utilization": result["utilization"],
+        "total_volume": result["total_volume"],
+    }
+    if details:
+        summary["layer_details"] = [
+            {
+                "layer": layer["layer"],
+                "orientation": list(layer["orientation"]),
+                "box_positions": [dict(b) for b in layer["box_positions"]],
+            }
+            for layer in result["layer_details"]
+        ]
+    return summary
+
+
+def parse_row(row):
+    """把输入行解析为 (Box, Pallet)"""
+    box = Box(*(_size(row[k]) for k in BOX_FIELDS))
+    pallet = Pallet(*(_size(row[k]) for k in PALLET_FIELDS))
+    return box, pallet
+
+
+def _record(row, box, pallet):
+    return {
+        "id": row.get("id"),
+        "box": [box.length, box.width, box.height],
+        "pallet": [pallet.length, pallet.width, pallet.max_height],
+    }
+
+
+def _error(row, index, exc):
+    return {"id": row.get("id", index), "error": f"{type(exc).__name__}: {exc}"}
+
+
+def solve_row(row, algorithms=tuple(SOLVERS), details=False, cache=None, trace=None):
+    """求解单行：对每种算法遍历所有摆放方向并取最优"""
+    box, pallet = parse_row(row)
+    record = _record(row, box, pallet)
+    for name in algorithms:
+        with span(trace, "solve", algorithm=name, id=record["id"]):
+            if cache is None:
+                # 与缓存、并行路径一致，按规范化的箱子求解
+                result = best_layout(canonical_box(box), pallet, SOLVERS[name], trace)
+            else:
+                result = cache.best_layout(box, pallet, name, trace)
+        record[name] = summarize(result, details)
+    return record
+
+
+def _compact_summary(chosen):
+    """把并行求解的紧凑结果转换为输出摘要"""
+    orientation, (total_boxes, layers, utilization, total_volume) = chosen
+    return {
+        "orientation": list(orientation),
+        "total_boxes": total_boxes,
+        "layers": layers,
+        "utilization": utilization,
+        "total_volume": total_volume,
+    }
+
+
+def _solve_block(solver, block, algorithms, details, cache):
+    """并行求解一批已解析的行，按输入顺序返回结果
+
+    同一批中尺寸相同（忽略摆放方向）的行只求解一次；传入 cache 时先查缓存。
+    """
+    summaries = {}
+    pending = {}
+    for index, pair, row, exc in block:
+        if pair is None:
+            continue
+        box, pallet = pair
+        for name in algorithms:
+            key = canonical_key(box, pallet, name)
+            if key in summaries or key in pending:
+                continue
+            cached = MISSING if cache is None else cache.get(key)
+            if cached is MISSING:
+                pending[key] = (canonical_box(box), pallet)
+            else:
+                summaries[key] = summarize(cached, details)
+
+    # 按 (箱子, 托盘) 合并未命中的算法，一次分发
+    targets = {}
+    for (dims, pallet_dims, name, _), pair in pending.items():
+        targets.setdefault((dims, pallet_dims), (pair, []))[1].append(name)
+    rebuild = []
+    for (pair, names), entry in zip(targets.values(), _best_entries(solver, targets.values())):
+        box, pallet = pair
+        for name in names:
+            key = canonical_key(box, pallet, name)
+            chosen = entry[name]
+            if chosen is None:
+                summaries[key] = None
+                if cache is not None:
+                    cache.put(key, None)
+            elif details or cache is not None:
+                rebuild.append((key, (*key[:2], chosen[0], name)))
+            else:
+                summaries[key] = _compact_summary(chosen)
+
+    # 需要明细或写入缓存时，只对最优方向在子进程中重建完整布局
+    if rebuild:
+        for (key, _), result in zip(rebuild, solver.layouts(task for _, task in rebuild)):
+            if cache is not None:
+                cache.put(key, result)
+            summaries[key] = summarize(result, details)
+
+    for index, pair, row, exc in block:
+        if pair is None:
+            yield _error(row, index, exc)
+            continue
+        box, pallet = pair
+        record = _record(row, box, pallet)
+        for name in algorithms:
+            record[name] = summaries[canonical_key(box, pallet, name)]
+        yield record
+
+
+def _best_entries(solver, targets):
+    """按算法分组调用并行求解，返回与 targets 对齐的 {算法: 最优方向结果}"""
+    targets = list(targets)
+    entries = [{} for _ in targets]
+    for name in SOLVERS:
+        indices = [i for i, (_, names) in enumerate(targets) if name in names]
+        if not indices:
+            continue
+        results = solver.best_orientations([targets[i][0] for i in indices], (name,))
+        for i, entry in zip(indices, results):
+            entries[i].update(entry)
+    return entries
+
+
+def solve_batch(rows, algorithms=tuple(SOLVERS), details=False, workers=1, chunksize=None,
+                block_size=512, cache=None, trace=None):
+    """逐行求解并以生成器形式返回结果；单行出错不会中断整批任务
+
+    workers > 1 时按 block_size 行一批分发到进程池，输出顺序与输入一致。
+    传入 cache（LayoutCache）时，尺寸相同的箱子只求解一次；
+    传入 trace（Trace）时记录每行（并行时为每批）的耗时。
+    """
+    if workers == 1:
+        for index, row in enumerate(rows):
+            try:
+                yield solve_row(row, algorithms, details, cache, trace)
+            except (KeyError, TypeError, ValueError) as exc:
+                yield _error(row, index, exc)
+        return
+
+    with ParallelSolver(workers, chunksize) as solver:
+        block = []
+        for index, row in enumerate(rows):
+            try:
+                block.append((index, parse_row(row), row, None))
+            except (KeyError, TypeError, ValueError) as exc:
+                block.append((index, None, row, exc))
+            if len(block) >= block_size:
+                yield from _traced_block(solver, block, algorithms, details, cache, trace)
+                block = []
+        if block:
+            yield from _traced_block(solver, block, algorithms, details, cache, trace)
+
+
+def _traced_block(solver, block, algorithms, details, cache, trace):
+    """先在追踪区间内求解完整批，再逐条返回（避免把下游写出耗时计入）"""
+    with span(trace, "solve.block", rows=len(block)):
+        records = list(_solve_block(solver, block, algorithms, details, cache))
+    return records
+
+
+def write_jsonl(records, f):
+    """逐条写出 JSONL"""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def _flatten(record):
+    """Parquet 输出使用扁平列，明细以 JSON 字符串保存"""
+    flat = {"id": None if record.get("id") is None else str(record["id"]), "error": record.get("error")}
+    for prefix, fields in (("box", BOX_FIELDS), ("pallet", PALLET_FIELDS)):
+        values = record.get(prefix) or [None] * 3
+        flat.update(zip(fields, values))
+    for name in SOLVERS:
+        summary = record.get(name) or {}
+        flat[f"{name}_orientation"] = summary.get("orientation")
+        for key in ("total_boxes", "layers", "utilization", "total_volume"):
+            flat[f"{name}_{key}"] = summary.get(key)
+        details = summary.get("layer_details")
+        flat[f"{name}_layer_details"] = None if details is None else json.dumps(details, ensure_ascii=False)
+    return flat
+
+
+def _parquet_schema(pa):
+    """Parquet 输出的固定列结构"""
+    fields = [("id", pa.string()), ("error", pa.string())]
+    fields += [(name, pa.float64()) for name in BOX_FIELDS + PALLET_FIELDS]
+    for name in SOLVERS:
+        fields += [
+            (f"{name}_orientation", pa.list_(pa.float64())),
+            (f"{name}_total_boxes", pa.int64()),
+            (f"{name}_layers", pa.int64()),
+            (f"{name}_utilization", pa.float64()),
+            (f"{name}_total_volume", pa.float64()),
+            (f"{name}_layer_details", pa.string()),
+        ]
+    return pa.schema(fields)
+
+
+def write_parquet(records, path, batch_size=1000):
+    """分批写出 Parquet（需要安装 pyarrow）"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet 输出需要安装 pyarrow") from exc
+
+    schema = _parquet_schema(pa)
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for record in records:
+            batch.append(_flatten(record))
+            count += 1
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch.clear()
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    return count
@@ -0,0 +1,181 @@
+"""求解结果缓存：进程内 LRU + 可选的 SQLite 磁盘缓存
+
+缓存键为 (排序后的箱子尺寸, 托盘尺寸, 算法, 算法版本)，同一箱子的 6 种摆放
+方向对应同一条缓存。缓存中的结果对象是共享的，调用方不应修改。
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from .solver import SOLVER_VERSION, SOLVERS, Box, best_layout
+from .trace import span
+
+
+# 区分"未缓存"与"已缓存的无解结果（None）"
+MISSING = object()
+
+
+def canonical_key(box, pallet, algorithm):
+    """规范化缓存键：箱子尺寸排序后与摆放方向无关"""
+    return (
+        tuple(sorted((box.length, box.width, box.height))),
+        (pallet.length, pallet.width, pallet.max_height),
+        algorithm,
+        SOLVER_VERSION,
+    )
+
+
+def canonical_box(box):
+    """按排序后的尺寸构造箱子，保证同一缓存键的求解结果唯一"""
+    return Box(*sorted((box.length, box.width, box.height)))
+
+
+class DiskCache:
+    """SQLite 磁盘缓存，总大小超过 max_bytes 时按最近访问时间淘汰"""
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS layouts ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS layouts_accessed ON layouts (accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        row = self._conn.execute("SELECT value FROM layouts WHERE key = ?", (repr(key),)).fetchone()
+        if row is None:
+            return MISSING
+        self._conn.execute("UPDATE layouts SET accessed = ? WHERE key = ?", (time.time(), repr(key)))
+        self._conn.commit()
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def put(self, key, value):
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO layouts (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+            (repr(key), blob, len(blob), time.time()),
+        )
+        evicted = self._evict()
+        self._conn.commit()
+        return evicted
+
+    def _evict(self):
+        """删除最久未访问的条目，直到总大小不超过上限"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM layouts").fetchone()[0]
+        evicted = 0
+        if total <= self.max_bytes:
+            return evicted
+        for key, size in self._conn.execute("SELECT key, size FROM layouts ORDER BY accessed").fetchall():
+            self._conn.execute("DELETE FROM layouts WHERE key = ?", (key,))
+            evicted += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return evicted
+
+    def close(self):
+        self._conn.close()
+
+
+class LayoutCache:
+    """两级缓存：进程内 LRU（按条目数淘汰）和可选的磁盘缓存（按字节数淘汰）
+
+    传入 store（store.SolutionStore）时，未命中内存的键先查预计算方案库（只读，不写回）。
+    """
+    def __init__(self, maxsize=1024, path=None, max_disk_bytes=256 * 1024 * 1024, store=None):
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = DiskCache(path, max_disk_bytes) if path else None
+        self.store = store
+        self.hits = 0
+        self.store_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self.store is not None:
+                value = self.store.get(key)
+                if value is not MISSING:
+                    self.store_hits += 1
+                    self._remember(key, value)
+                    return value
+            if self.disk is not None:
+                value = self.disk.get(key)
+                if value is not MISSING:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                    return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self.disk is not None:
+                self.disk_evictions += self.disk.put(key, value)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def best_layout(self, box, pallet, algorithm="improved", trace=None):
+        """带缓存的 best_layout，algorithm 为 SOLVERS 中的算法名"""
+        key = canonical_key(box, pallet, algorithm)
+        with span(trace, "cache.lookup", algorithm=algorithm) as record:
+            result = self.get(key)
+            if record is not None:
+                record["hit"] = result is not MISSING
+        if result is MISSING:
+            result = best_layout(canonical_box(box), pallet, SOLVERS[algorithm], trace)
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        """命中/未命中计数"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+_default_cache = None
+
+
+def default_cache():
+    """进程级共享缓存；设置环境变量 PALLETIZE_CACHE 时启用对应路径的磁盘缓存，
+    设置 PALLETIZE_STORE 时先查对应路径的预计算方案库"""
+    global _default_cache
+    if _default_cache is None:
+        store = None
+        if os.environ.get("PALLETIZE_STORE"):
+            from .store import SolutionStore
+            store = SolutionStore(os.environ["PALLETIZE_STORE"])
+        _default_cache = LayoutCache(path=os.environ.get("PALLETIZE_CACHE"), store=store)
+    return _default_cache
@@ -0,0 +1,112 @@
+"""图像导出：按需渲染，并按 (布局指纹, 格式, dpi) 缓存渲染结果
+
+导出只在用户请求下载时执行；同一布局重复下载直接返回缓存的字节。
+本模块不在导入时加载 matplotlib。
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+# 格式名 -> (savefig 格式, MIME 类型, 默认 dpi, 文件扩展名)
+EXPORT_FORMATS = {
+    "png": ("png", "image/png", 300, "png"),
+    "preview": ("png", "image/png", 72, "png"),
+    "svg": ("svg", "image/svg+xml", None, "svg"),
+    "pdf": ("pdf", "application/pdf", None, "pdf"),
+}
+
+
+def layout_fingerprint(pallet, layout):
+    """布局指纹：托盘尺寸 + 所有箱子的坐标列，用作导出缓存键"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((pallet.length, pallet.width, pallet.max_height)).encode())
+    columns = getattr(layout, "columns", None)
+    if columns is not None:
+        for name in sorted(columns):
+            digest.update(name.encode())
+            digest.update(columns[name].tobytes())
+        digest.update(layout.type_codes.tobytes())
+        digest.update(repr(layout.type_names).encode())
+    else:
+        digest.update(repr([(l["layer"], list(map(dict, l["box_positions"])))
+                            for l in layout["layer_details"]]).encode())
+    digest.update(repr((layout["total_boxes"], layout["layers"])).encode())
+    return digest.hexdigest()
+
+
+def render_figure(fig, fmt="png", dpi=None):
+    """把 figure 渲染为指定格式的字节"""
+    save_format, _, default_dpi, _ = EXPORT_FORMATS[fmt]
+    buf = io.BytesIO()
+    fig.savefig(buf, format=save_format, dpi=dpi or default_dpi or "figure", bbox_inches='tight')
+    return buf.getvalue()
+
+
+class ExportCache:
+    """渲染结果的 LRU 缓存，总字节数超过 max_bytes 时淘汰最久未使用的条目"""
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self._entries), "bytes": self._size}
+
+
+_default_export_cache = None
+
+
+def default_export_cache():
+    """进程级共享的导出缓存"""
+    global _default_export_cache
+    if _default_export_cache is None:
+        _default_export_cache = ExportCache()
+    return _default_export_cache
+
+
+def export_layout(fingerprint, make_figure, fmt="png", dpi=None, cache=None):
+    """按需导出布局图像，返回 (字节, MIME 类型, 文件名)
+
+    make_figure 仅在缓存未命中时调用，生成的 figure 渲染后立即关闭。
+    """
+    cache = default_export_cache() if cache is None else cache
+    _, mime, default_dpi, extension = EXPORT_FORMATS[fmt]
+    dpi = dpi or default_dpi
+    key = (fingerprint, fmt, dpi)
+    data = cache.get(key)
+    if data is None:
+        import matplotlib.pyplot as plt
+        fig = make_figure()
+        try:
+            data = render_figure(fig, fmt, dpi)
+        finally:
+            plt.close(fig)
+        cache.put(key, data)
+    suffix = "_preview" if fmt == "preview" else ""
+    return data, mime, f"stacking_3d_view{suffix}.{extension}"
@@ -0,0 +1,355 @@
+"""列式布局表示：用连续的 NumPy 列保存所有箱子的位置和尺寸
+
+Layout 同时实现只读的 dict 接口（"layer_details" / "box_positions" 等），
+原有的绘图函数无需修改即可使用；批量导出、进程间传输和绘图则直接使用列数据。
+"""
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+
+import numpy as np
+
+# 箱子类型编码，未列出的类型在构造时追加到布局自己的类型表中
+BOX_TYPES = ("main", "extra_x", "extra_x_rot", "extra_y", "extra_y_rot", "block", "block_rot")
+
+# 坐标与尺寸列
+COLUMNS = ("x", "y", "z", "l", "w", "h")
+
+# 与求解器原先返回的 dict 保持相同的键顺序
+SUMMARY_KEYS = ("type", "orientation", "total_boxes", "layers", "utilization",
+                "layer_details", "total_volume", "pallet_volume")
+
+
+def _readonly(array):
+    array.flags.writeable = False
+    return array
+
+
+def _compact(values):
+    """整数列使用能容纳的最小整数类型（留出 x + l 等求和的余量），其余使用 float64"""
+    array = np.asarray(values)
+    if array.dtype.kind not in "iu":
+        return array.astype(np.float64, copy=False)
+    bound = 2 * int(np.abs(array).max(initial=0))
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return array.astype(dtype)
+    return array.astype(np.int64, copy=False)
+
+
+def pattern_columns(box_positions):
+    """把一层的箱子 dict 列表转换为列数组（用于按层布局拼接 Layout）"""
+    codes = {name: code for code, name in enumerate(BOX_TYPES)}
+    columns = {name: np.array([box[name] for box in box_positions]) for name in ("x", "y", "l", "w")}
+    columns["type"] = np.array([codes[box["type"]] for box in box_positions], dtype=np.int8)
+    columns["area"] = float(np.sum(columns["l"] * columns["w"]))
+    return columns
+
+
+class Layout(Mapping):
+    """列式布局：columns 保存每个箱子的 x, y, z, l, w, h 和类型编码，
+    layer_offsets[i]:layer_offsets[i+1] 为第 i 层箱子在列中的下标范围"""
+    def __init__(self, summary, columns, type_codes, type_names, layer_offsets, layer_orientations):
+        self.summary = dict(summary)
+        self.columns = {name: _readonly(np.asarray(columns[name])) for name in COLUMNS}
+        self.type_codes = _readonly(np.asarray(type_codes, dtype=np.int8))
+        self.type_names = tuple(type_names)
+        self.layer_offsets = _readonly(np.asarray(layer_offsets, dtype=np.int64))
+        self.layer_orientations = tuple(tuple(o) for o in layer_orientations)
+
+    @classmethod
+    def from_layers(cls, summary, layers, h):
+        """由求解器的分层 dict 构造，h 为箱子高度"""
+        type_names = list(BOX_TYPES)
+        codes = {name: code for code, name in enumerate(type_names)}
+        values = {name: [] for name in COLUMNS}
+        type_codes = []
+        offsets = [0]
+        for index, layer in enumerate(layers):
+            z = index * h
+            for box in layer["box_positions"]:
+                if box["type"] not in codes:
+                    codes[box["type"]] = len(type_names)
+                    type_names.append(box["type"])
+                type_codes.append(codes[box["type"]])
+                values["x"].append(box["x"])
+                values["y"].append(box["y"])
+                values["l"].append(box["l"])
+                values["w"].append(box["w"])
+            count = len(layer["box_positions"])
+            values["z"].extend([z] * count)
+            values["h"].extend([h] * count)
+            offsets.append(offsets[-1] + count)
+        values = {name: _compact(column) for name, column in values.items()}
+        return cls(summary, values, type_codes, type_names, offsets,
+                   [layer["orientation"] for layer in layers])
+
+    @classmethod
+    def from_boxes(cls, summary, boxes):
+        """由带 z、h 的箱子 dict 列表构造（混装堆码），底面高度相同的箱子为一层"""
+        boxes = sorted(boxes, key=lambda box: (box["z"], box["y"], box["x"]))
+        type_names = list(BOX_TYPES)
+        codes = {name: code for code, name in enumerate(type_names)}
+        for box in boxes:
+            if box["type"] not in codes:
+                codes[box["type"]] = len(type_names)
+                type_names.append(box["type"])
+        values = {name: _compact([box[name] for box in boxes]) for name in COLUMNS}
+        z = np.asarray([box["z"] for box in boxes])
+        starts = np.flatnonzero(np.diff(z, prepend=np.nan))
+        offsets = np.append(starts, len(boxes))
+        # 混装层内箱子尺寸不一，方向只记录层内最高的箱子高度
+        orientations = [(None, None, max(box["h"] for box in boxes[start:stop]))
+                        for start, stop in zip(offsets[:-1], offsets[1:])]
+        summary = dict(summary, layers=len(orientations))
+        return cls(summary, values, [codes[box["type"]] for box in boxes], type_names, offsets,
+                   orientations)
+
+    @classmethod
+    def from_patterns(cls, summary, patterns, indices, h, orientation):
+        """由若干层布局（pattern_columns 的结果）按层下标拼接构造，列数据在首次访问时生成"""
+        return StampedLayout(summary, patterns, indices, h, orientation)
+
+    # ---- dict 兼容接口 ----
+    def __getitem__(self, key):
+        if key == "layer_details":
+            return LayerDetails(self)
+        if key in SUMMARY_KEYS:
+            return self.summary[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(SUMMARY_KEYS)
+
+    def __len__(self):
+        return len(SUMMARY_KEYS)
+
+    def __repr__(self):
+        return (f"Layout(total_boxes={self.summary['total_boxes']}, layers={self.summary['layers']}, "
+                f"orientation={self.summary['orientation']})")
+
+    @property
+    def box_count(self):
+        return int(self.layer_offsets[-1])
+
+    @property
+    def layer_count(self):
+        return len(self.layer_offsets) - 1
+
+    def layer_slice(self, index):
+        """第 index 层（从 0 开始）在列中的切片"""
+        return slice(int(self.layer_offsets[index]), int(self.layer_offsets[index + 1]))
+
+    def head(self, count):
+        """前 count 个箱子（按层顺序）组成的布局：下面各层完整，最上层可能不满"""
+        count = max(0, min(int(count), self.box_count))
+        layers = int(np.searchsorted(self.layer_offsets, count))
+        columns = {name: self.columns[name][:count] for name in COLUMNS}
+        # 整数列可能是 int16，先转换为浮点数再相乘，避免溢出
+        l, w, h = (columns[name].astype(np.float64) for name in ("l", "w", "h"))
+        total_volume = float(np.sum(l * w * h))
+        summary = dict(self.summary, total_boxes=count, layers=layers, total_volume=total_volume,
+                       utilization=min(total_volume / self.summary["pallet_volume"], 1.0))
+        return Layout(summary, columns, self.type_codes[:count], self.type_names,
+                      np.minimum(self.layer_offsets[:layers + 1], count), self.layer_orientations[:layers])
+
+    def layer_patterns(self):
+        """按层布局去重：返回 (每层的样式编号数组, 每种样式包含的层下标列表)
+
+        两层的箱子坐标、尺寸、类型和摆放方向都相同时视为同一样式，样式按首次出现的顺序编号。
+        """
+        keys = {}
+        pattern_ids = np.empty(self.layer_count, dtype=np.int64)
+        groups = []
+        for index in range(self.layer_count):
+            rows = self.layer_slice(index)
+            key = (self.layer_orientations[index], self.type_codes[rows].tobytes(),
+                   *(self.columns[name][rows].tobytes() for name in ("x", "y", "l", "w")))
+            if key not in keys:
+                keys[key] = len(groups)
+                groups.append([])
+            pattern_ids[index] = keys[key]
+            groups[keys[key]].append(index)
+        return pattern_ids, groups
+
+    def box_types(self):
+        """每个箱子的类型名数组"""
+        return np.asarray(self.type_names, dtype=object)[self.type_codes]
+
+    def to_dict(self):
+        """转换为普通的嵌套 dict / list（用于 JSON 序列化）"""
+        result = {key: self.summary[key] for key in SUMMARY_KEYS if key != "layer_details"}
+        result["layer_details"] = [
+            {
+                "layer": layer["layer"],
+                "orientation": layer["orientation"],
+                "box_positions": [dict(box) for box in layer["box_positions"]],
+            }
+            for layer in self["layer_details"]
+        ]
+        return {key: result[key] for key in SUMMARY_KEYS}
+
+    # ---- 导出 ----
+    def to_records(self):
+        """转换为结构化数组（每个箱子一条记录）"""
+        dtype = [(name, self.columns[name].dtype) for name in COLUMNS] + [("type", np.int8)]
+        records = np.empty(self.box_count, dtype=dtype)
+        for name in COLUMNS:
+            records[name] = self.columns[name]
+        records["type"] = self.type_codes
+        return records
+
+    def save_npz(self, path):
+        """保存为 .npz，各列缓冲区直接写出，不做格式转换"""
+        np.savez(path, type=self.type_codes, layer_offsets=self.layer_offsets,
+                 type_names=np.asarray(self.type_names), **self.columns)
+
+    def to_arrow(self):
+        """导出为 pyarrow.Table；数值列共享 NumPy 缓冲区（零拷贝），需要安装 pyarrow"""
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise RuntimeError("Arrow 导出需要安装 pyarrow") from exc
+        arrays = [pa.array(self.columns[name]) for name in COLUMNS]
+        arrays.append(pa.DictionaryArray.from_arrays(pa.array(self.type_codes),
+                                                     pa.array(self.type_names)))
+        layer = np.repeat(np.arange(1, self.layer_count + 1, dtype=np.int32), np.diff(self.layer_offsets))
+        arrays.append(pa.array(layer))
+        return pa.Table.from_arrays(arrays, names=list(COLUMNS) + ["type", "layer"])
+
+
+class StampedLayout(Layout):
+    """由重复的层布局拼接而成的布局：构造只计算各层的下标范围（每层 O(1)），
+    列数据和类型编码在首次访问时按层下标一次性拼接生成。
+
+    求解器对每个摆放方向都构造布局，但只有箱数最多的方案会被绘图或导出，
+    其余方案不会生成列数据；进程间传输时也只传输去重后的层布局。
+    """
+    def __init__(self, summary, patterns, indices, h, orientation):
+        self.summary = dict(summary)
+        self.type_names = BOX_TYPES
+        self.layer_orientations = (tuple(orientation),) * len(indices)
+        self._patterns = patterns
+        self._indices = np.asarray(indices, dtype=np.int64)
+        self._h = h
+        sizes = np.array([len(pattern["x"]) for pattern in patterns], dtype=np.int64)
+        self.layer_offsets = _readonly(np.concatenate([[0], np.cumsum(sizes[self._indices])]))
+
+    @cached_property
+    def _stamped(self):
+        parts = [self._patterns[i] for i in self._indices]
+        counts = np.diff(self.layer_offsets)
+        values = {name: np.concatenate([part[name] for part in parts]) for name in ("x", "y", "l", "w")}
+        values["z"] = np.repeat(np.arange(len(parts)) * self._h, counts)
+        values["h"] = np.repeat(np.asarray([self._h]), self.box_count)
+        columns = {name: _readonly(_compact(values[name])) for name in COLUMNS}
+        return columns, _readonly(np.concatenate([part["type"] for part in parts]))
+
+    def __getstate__(self):
+        # 序列化时不保存已生成的列数据，只保存层布局和层下标
+        state = dict(self.__dict__)
+        state.pop("_stamped", None)
+        return state
+
+    @property
+    def columns(self):
+        return self._stamped[0]
+
+    @property
+    def type_codes(self):
+        return self._stamped[1]
+
+    def layer_patterns(self):
+        """层下标即为样式编号（求解器按首次出现的顺序为层布局编号），无需比较列数据"""
+        used, pattern_ids = np.unique(self._indices, return_inverse=True)
+        groups = [np.flatnonzero(pattern_ids == i).tolist() for i in range(len(used))]
+        return pattern_ids, groups
+
+
+class LayerDetails(Sequence):
+    """layout["layer_details"] 的只读视图"""
+    def __init__(self, layout):
+        self._layout = layout
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return LayerView(self._layout, index)
+
+    def __len__(self):
+        return self._layout.layer_count
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+
+class LayerView(Mapping):
+    """单层的只读视图，键与原先的 layer_info dict 相同"""
+    _keys = ("layer", "orientation", "box_positions")
+
+    def __init__(self, layout, index):
+        self._layout = layout
+        self._index = index
+
+    def __getitem__(self, key):
+        if key == "layer":
+            return self._index + 1
+        if key == "orientation":
+            return self._layout.layer_orientations[self._index]
+        if key == "box_positions":
+            return BoxPositions(self._layout, self._layout.layer_slice(self._index))
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class BoxPositions(Sequence):
+    """一层中所有箱子的只读视图"""
+    def __init__(self, layout, span):
+        self._layout = layout
+        self._start = span.start
+        self._stop = span.stop
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return BoxView(self._layout, self._start + index)
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+
+class BoxView(Mapping):
+    """单个箱子的只读视图，键为 type, x, y, l, w"""
+    _keys = ("type", "x", "y", "l", "w")
+
+    def __init__(self, layout, row):
+        self._layout = layout
+        self._row = row
+
+    def __getitem__(self, key):
+        if key == "type":
+            return self._layout.type_names[self._layout.type_codes[self._row]]
+        if key in self._keys:
+            return self._layout.columns[key][self._row].item()
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,216 @@
+"""混装堆码：一个托盘上放置多种箱型（SKU）
+
+箱子按高度分组（高的组先放）、组内按底面积从大到小依次放置，同高的箱子相邻放置形成平整的顶面。
+托盘表面用坐标压缩的顶面高度栅格表示（栅格线只取已放置箱子的边，与尺寸精度无关），沿用 place_box
+的支撑规则：箱子底面必须被下方完全支撑（底面覆盖的所有单元顶面高度相同）。每个箱子放在最低、
+再最靠下、最靠左的候选角点上；候选点按所在单元的高度（放置高度的下界）排序逐个检查，
+找到的位置不可能被后面的候选点超过时即停止，只读取候选点附近的单元，不需要遍历已放置的箱子。
+"""
+import numpy as np
+
+from .layout import Layout
+from .solver import _EPS, LayerGrid
+
+
+class Item:
+    """一种箱型及其数量；箱子保持高度方向不变，只允许在水平面内旋转 90°"""
+    def __init__(self, box, quantity, sku=None):
+        self.box = box
+        self.quantity = int(quantity)
+        self.sku = sku if sku is not None else f"{box.length}×{box.width}×{box.height}"
+
+
+def _grow(array, size, axis=0, fill=0.0):
+    """容量不足时按两倍扩容（预分配，避免每次放置都重新分配），新增部分填充 fill"""
+    if array.shape[axis] >= size:
+        return array
+    shape = list(array.shape)
+    shape[axis] = max(size, 2 * shape[axis])
+    grown = np.full(shape, fill, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+
+class HeightMap:
+    """托盘表面的坐标压缩顶面高度栅格与候选放置点（已放置箱子的右下角、左上角和顶面角点）
+
+    gx[:nx]、gy[:ny] 为栅格线，top[i, j] 为单元 [gx[i], gx[i+1]]×[gy[j], gy[j+1]] 的顶面高度；
+    栅格线、单元高度和候选点都保存在预分配的数组中，容量不足时成倍扩容。
+    当前箱型各方向在每个候选点上的放置高度会被缓存（inf 为未计算，nan 为无支撑），
+    放置箱子后只重算底面与新箱子相交的候选点；同一 SKU 连续放置时大部分候选点无需重算。
+    """
+    def __init__(self, pallet, capacity=64):
+        self.pallet = pallet
+        self.gx = np.zeros(capacity)
+        self.gy = np.zeros(capacity)
+        self.gx[1], self.gy[1] = pallet.length, pallet.width
+        self.nx = self.ny = 2
+        self.top = np.zeros((capacity, capacity))
+        self.cx = np.zeros(capacity)
+        self.cy = np.zeros(capacity)
+        self.count = 1
+        self._seen = {(0, 0)}
+        self._sizes = None
+        self._heights = []
+
+    def _split_x(self, value):
+        """在 x = value 处加入栅格线（被切开的单元复制一份），返回栅格线下标"""
+        n = self.nx
+        i = int(np.searchsorted(self.gx[:n], value - _EPS))
+        if i < n and self.gx[i] - value <= _EPS:
+            return i
+        self.gx = _grow(self.gx, n + 1)
+        self.top = _grow(self.top, n + 1, axis=0)
+        self.gx[i + 1:n + 1] = self.gx[i:n]
+        self.gx[i] = value
+        self.top[i:n] = self.top[i - 1:n - 1]
+        self.nx += 1
+        return i
+
+    def _split_y(self, value):
+        n = self.ny
+        j = int(np.searchsorted(self.gy[:n], value - _EPS))
+        if j < n and self.gy[j] - value <= _EPS:
+            return j
+        self.gy = _grow(self.gy, n + 1)
+        self.top = _grow(self.top, n + 1, axis=1)
+        self.gy[j + 1:n + 1] = self.gy[j:n]
+        self.gy[j] = value
+        self.top[:, j:n] = self.top[:, j - 1:n - 1]
+        self.ny += 1
+        return j
+
+    def _span(self, x0, y0, x1, y1):
+        """底面 [x0, x1]×[y0, y1]（可为数组）覆盖的单元下标范围 (i0, i1, j0, j1)"""
+        gx, gy = self.gx[:self.nx], self.gy[:self.ny]
+        x0, y0, x1, y1 = (np.asarray(v) for v in (x0, y0, x1, y1))
+        return (np.searchsorted(gx, x0 + _EPS, side="right") - 1, np.searchsorted(gx, x1 - _EPS),
+                np.searchsorted(gy, y0 + _EPS, side="right") - 1, np.searchsorted(gy, y1 - _EPS))
+
+    def _height(self, i0, i1, j0, j1):
+        """单元范围内顶面高度相同（完全支撑）时返回放置高度，否则返回 None"""
+        region = self.top[i0:i1, j0:j1]
+        z = region.max()
+        return float(z) if region.min() == z else None
+
+    def support_height(self, x0, y0, x1, y1):
+        """底面 [x0, x1]×[y0, y1] 完全支撑时返回放置高度，否则返回 None"""
+        return self._height(*self._span(x0, y0, x1, y1))
+
+    def find(self, sizes, h):
+        """在候选点中为底面尺寸 sizes（一个或两个方向）找最低的放置位置，返回 (z, x, y, l, w) 或 None"""
+        pallet = self.pallet
+        xs, ys = self.cx[:self.count], self.cy[:self.count]
+        if self._sizes != tuple(sizes):
+            self._sizes = tuple(sizes)
+            self._heights = [np.full(len(self.cx), np.inf) for _ in sizes]
+        # 位置按 (z, y, x, 方向序号) 比较：最低、再最靠下、最靠左，同一位置取先尝试的方向
+        best = None
+        unknown = []
+        for k, ((l, w), heights) in enumerate(zip(sizes, self._heights)):
+            heights = heights[:self.count]
+            fits = (xs + l <= pallet.length + _EPS) & (ys + w <= pallet.width + _EPS)
+            ok = fits & (heights != np.inf) & (heights + h <= pallet.max_height + _EPS)  # nan 比较为 False
+            if ok.any():
+                i = np.flatnonzero(ok)[np.lexsort((xs[ok], ys[ok], heights[ok]))[0]]
+                found = (heights[i].item(), ys[i].item(), xs[i].item(), k)
+                best = found if best is None or found < best else best
+            unknown += [(i, k) for i in np.flatnonzero(fits & (heights == np.inf)).tolist()]
+        if unknown:
+            best = self._search(sizes, h, unknown, best)
+        if best is None:
+            return None
+        z, y, x, k = best
+        return (z, x, y, *sizes[k])
+
+    def _search(self, sizes, h, unknown, best):
+        """逐个计算未缓存的候选点，按 (单元高度, y, x) 排序：实际位置不小于该键，键超过当前最优时即可停止"""
+        index = np.array([i for i, _ in unknown])
+        xs, ys = self.cx[index], self.cy[index]
+        i0, _, j0, _ = self._span(xs, ys, xs, ys)
+        lower = self.top[i0, j0]
+        spans = [[v.tolist() for v in self._span(*LayerGrid.cells(xs, ys, l, w))] for l, w in sizes]
+        for n in np.lexsort(([k for _, k in unknown], xs, ys, lower)).tolist():
+            i, k = unknown[n]
+            x, y = xs[n].item(), ys[n].item()
+            if best is not None and (lower[n], y, x) > best[:3]:
+                break
+            i0, i1, j0, j1 = (v[n] for v in spans[k])
+            z = self._height(i0, i1, j0, j1)
+            self._heights[k][i] = np.nan if z is None else z
+            if z is None or z + h > self.pallet.max_height + _EPS:
+                continue
+            if best is None or (z, y, x, k) < best:
+                best = (z, y, x, k)
+        return best
+
+    def place(self, x, y, l, w, z, h):
+        x0, y0, x1, y1 = LayerGrid.cells(x, y, l, w)
+        i0, i1 = self._split_x(x0), self._split_x(x1)
+        j0, j1 = self._split_y(y0), self._split_y(y1)
+        self.top[i0:i1, j0:j1] = z + h
+        # 底面与新箱子相交的候选点需要重算放置高度
+        xs, ys = self.cx[:self.count], self.cy[:self.count]
+        for (size_l, size_w), heights in zip(self._sizes or (), self._heights):
+            stale = ((xs < x1 - _EPS) & (xs + size_l > x0 + _EPS) &
+                     (ys < y1 - _EPS) & (ys + size_w > y0 + _EPS))
+            heights[:self.count][stale] = np.inf
+        for point in ((x + l, y), (x, y + w), (x, y)):
+            if point not in self._seen and point[0] < self.pallet.length - _EPS and point[1] < self.pallet.width - _EPS:
+                self._seen.add(point)
+                self.cx = _grow(self.cx, self.count + 1)
+                self.cy = _grow(self.cy, self.count + 1)
+                self._heights = [_grow(heights, self.count + 1, fill=np.inf) for heights in self._heights]
+                self.cx[self.count], self.cy[self.count] = point
+                self.count += 1
+
+
+def height_groups(items):
+    """按箱子高度分组，较高的组在前，组内按底面积从大到小排列"""
+    groups = {}
+    for item in items:
+        groups.setdefault(item.box.height, []).append(item)
+    for group in groups.values():
+        group.sort(key=lambda item: -item.box.length * item.box.width)
+    return sorted(groups.items(), key=lambda group: -group[0])
+
+
+def calculate_mixed_layout(items, pallet):
+    """混装堆码，返回 (Layout, 未放置数量 {sku: 数量})；无法放置任何箱子时 Layout 为 None
+
+    箱子类型即为 SKU 名称，绘图时按 SKU 着色；Layout 的各层为底面高度相同的箱子。
+    """
+    heightmap = HeightMap(pallet)
+    boxes = []
+    unplaced = {}
+    for h, group in height_groups(item for item in items if item.quantity > 0):
+        for item in group:
+            sizes = [(item.box.length, item.box.width)]
+            if item.box.width != item.box.length:
+                sizes.append((item.box.width, item.box.length))
+            remaining = item.quantity
+            while remaining:
+                found = heightmap.find(sizes, h)
+                if found is None:
+                    break  # 该箱型已无处可放
+                z, x, y, l, w = found
+                heightmap.place(x, y, l, w, z, h)
+                boxes.append({"type": item.sku, "x": x, "y": y, "z": z, "l": l, "w": w, "h": h})
+                remaining -= 1
+            if remaining:
+                unplaced[item.sku] = unplaced.get(item.sku, 0) + remaining
+    if not boxes:
+        return None, unplaced
+
+    total_volume = sum(box["l"] * box["w"] * box["h"] for box in boxes)
+    # 计算空间利用率
+    pallet_volume = pallet.length * pallet.width * pallet.max_height
+    utilization = total_volume / pallet_volume
+    return Layout.from_boxes({
+        "type": "混装堆码",
+        "orientation": None,
+        "total_boxes": len(boxes),
+        "utilization": min(utilization, 1.0),
+        "total_volume": total_volume,
+        "pallet_volume": pallet_volume
+    }, boxes), unplaced
@@ -0,0 +1,191 @@
+"""单层装箱引擎：在托盘底面上放置尽可能多的相同矩形箱子（允许 90° 旋转）
+
+引擎可插拔（PACKERS），共享按子矩形尺寸记忆化的结果和当前最优解，
+超出搜索预算时立即停止搜索并返回目前最优的布局。预算默认按搜索节点数计（尝试的切割位置和
+五块划分的候选数），结果只取决于输入，可以缓存和离线预计算；交互场景可另外指定时间预算（秒），
+此时结果可能因机器速度而异：
+
+- guillotine：递归一刀切划分，每块取两种方向中箱数较多的整齐排列
+- block：一阶非一刀切的五块（风车）划分，每块再按 guillotine 求解
+"""
+import time
+from bisect import bisect_right
+from functools import lru_cache
+
+# 单层装箱的默认节点预算（大约相当于 0.1~0.3 秒）；修改后块状堆码的结果会变化，需同时递增 SOLVER_VERSION
+DEFAULT_NODES = 40_000
+
+# 浮点尺寸比较的容差
+_EPS = 1e-9
+
+
+def _fit(length, size):
+    """length 内能排下的 size 个数"""
+    return int((length + _EPS) // size)
+
+
+def raster_points(a, b, limit):
+    """不超过 limit 的所有 i*a + j*b（i, j >= 0），升序；一刀切位置只需取这些点"""
+    points = set()
+    for i in range(_fit(limit, a) + 1):
+        base = i * a
+        for j in range(_fit(limit - base, b) + 1):
+            points.add(base + j * b)
+    return sorted(points)
+
+
+class Packer:
+    """一次装箱的搜索状态：可用切割位置、子矩形记忆表和搜索预算（节点数，可选截止时间）
+
+    plan 为嵌套元组：("grid", l, w, nx, ny) 整齐排列；("x", 位置, 左, 右) 竖切；
+    ("y", 位置, 下, 上) 横切；("five", (x1, x2, y1, y2), 五块) 风车划分。
+    """
+    def __init__(self, a, b, length, width, nodes, deadline=None):
+        self.a = a
+        self.b = b
+        self.length = length
+        self.width = width
+        self.nodes = nodes
+        self.deadline = deadline
+        self.xs = raster_points(a, b, length)
+        self.ys = raster_points(a, b, width)
+        self.memo = {}
+
+    def expired(self, cost=1):
+        """计入 cost 个搜索节点，返回预算是否已用完"""
+        self.nodes -= cost
+        return self.nodes < 0 or (self.deadline is not None and time.perf_counter() > self.deadline)
+
+    @staticmethod
+    def _floor(points, value):
+        """不超过 value 的最大切割位置（子矩形缩小到该尺寸不会减少箱数）"""
+        return points[bisect_right(points, value + _EPS) - 1]
+
+    def bound(self, x, y):
+        """面积上界"""
+        return int((x * y + _EPS) // (self.a * self.b))
+
+    def homogeneous(self, x, y):
+        """两种方向的整齐排列中箱数较多的一种，返回 (箱数, plan)"""
+        a, b = self.a, self.b
+        first = (_fit(x, a) * _fit(y, b), ("grid", a, b, _fit(x, a), _fit(y, b)))
+        second = (_fit(x, b) * _fit(y, a), ("grid", b, a, _fit(x, b), _fit(y, a)))
+        return first if first[0] >= second[0] else second
+
+    def guillotine(self, x, y):
+        """x × y 子矩形的最优一刀切布局（x、y 为切割位置），返回 (箱数, plan)"""
+        key = (x, y)
+        if key in self.memo:
+            return self.memo[key]
+        best = self.homogeneous(x, y)
+        bound = self.bound(x, y)
+        # 对称性：只需尝试不超过一半的切割位置
+        for axis, points, size, other in (("x", self.xs, x, y), ("y", self.ys, y, x)):
+            for cut in points:
+                if best[0] >= bound or cut > size / 2 + _EPS or self.expired():
+                    break
+                if cut == 0:
+                    continue
+                rest = self._floor(points, size - cut)
+                if axis == "x":
+                    first, second = self.guillotine(cut, y), self.guillotine(rest, y)
+                else:
+                    first, second = self.guillotine(x, cut), self.guillotine(x, rest)
+                if first[0] + second[0] > best[0]:
+                    best = (first[0] + second[0], (axis, cut, first[1], second[1]))
+        self.memo[key] = best
+        return best
+
+
+def pack_guillotine(packer, best):
+    """一刀切引擎"""
+    x = Packer._floor(packer.xs, packer.length)
+    y = Packer._floor(packer.ys, packer.width)
+    result = packer.guillotine(x, y)
+    return result if result[0] > best[0] else best
+
+
+def pack_five_block(packer, best):
+    """五块（风车）引擎：0 < x1 < x2 < L、0 < y1 < y2 < W 把托盘分为
+
+    左下 [0, x1]×[0, y2]、右下 [x1, L]×[0, y1]、右上 [x2, L]×[y1, W]、
+    左上 [0, x2]×[y2, W] 和中间 [x1, x2]×[y1, y2] 五块，每块按 guillotine 求解。
+    """
+    length, width = packer.length, packer.width
+    total_bound = packer.bound(length, width)
+    xs = [x for x in packer.xs if 0 < x < length - _EPS]
+    ys = [y for y in packer.ys if 0 < y < width - _EPS]
+    # 每组 (x1, x2) 要检查所有 (y1, y2) 候选，按候选数计入节点
+    cost = len(ys) * (len(ys) - 1) // 2
+    for i, x1 in enumerate(xs):
+        for x2 in xs[i + 1:]:
+            if best[0] >= total_bound or packer.expired(cost):
+                return best
+            for j, y1 in enumerate(ys):
+                for y2 in ys[j + 1:]:
+                    blocks = ((x1, y2), (length - x1, y1), (length - x2, width - y1),
+                              (x2, width - y2), (x2 - x1, y2 - y1))
+                    if sum(packer.bound(bx, by) for bx, by in blocks) <= best[0]:
+                        continue
+                    parts = [packer.guillotine(Packer._floor(packer.xs, bx), Packer._floor(packer.ys, by))
+                             for bx, by in blocks]
+                    count = sum(part[0] for part in parts)
+                    if count > best[0]:
+                        best = (count, ("five", (x1, x2, y1, y2), tuple(part[1] for part in parts)))
+    return best
+
+
+# 可插拔的单层装箱引擎：engine(packer, 当前最优) -> 新的最优 (箱数, plan)
+PACKERS = {
+    "guillotine": pack_guillotine,
+    "block": pack_five_block,
+}
+
+
+def _emit(plan, x0, y0, out):
+    """把 plan 展开为箱子 (x, y, l, w) 列表"""
+    kind = plan[0]
+    if kind == "grid":
+        _, l, w, nx, ny = plan
+        for i in range(nx):
+            for j in range(ny):
+                out.append((x0 + i * l, y0 + j * w, l, w))
+    elif kind == "x":
+        _, cut, first, second = plan
+        _emit(first, x0, y0, out)
+        _emit(second, x0 + cut, y0, out)
+    elif kind == "y":
+        _, cut, first, second = plan
+        _emit(first, x0, y0, out)
+        _emit(second, x0, y0 + cut, out)
+    else:
+        _, (x1, x2, y1, y2), parts = plan
+        for (dx, dy), part in zip(((0, 0), (x1, 0), (x2, y1), (0, y2), (x1, y1)), parts):
+            _emit(part, x0 + dx, y0 + dy, out)
+
+
+@lru_cache(maxsize=256)
+def _pack(a, b, length, width, engines, nodes, budget):
+    deadline = None if budget is None else time.perf_counter() + budget
+    packer = Packer(a, b, length, width, nodes, deadline)
+    best = (0, ("grid", a, b, 0, 0))
+    for name in engines:
+        best = PACKERS[name](packer, best)
+    boxes = []
+    _emit(best[1], 0, 0, boxes)
+    return tuple(boxes)
+
+
+def pack_layer(l, w, length, width, engines=tuple(PACKERS), nodes=None, budget=None):
+    """求单层布局，返回 box_positions（与 fill_layer 的层内箱子格式相同）
+
+    按 l × w 放置的箱子类型为 "block"，旋转 90° 的为 "block_rot"。
+    超出节点预算 nodes（默认 DEFAULT_NODES）时返回目前最优的布局，结果可复现；
+    另外指定时间预算 budget（秒）时先到者为准，结果可能因机器速度而异，不应写入缓存或方案库。
+    """
+    nodes = DEFAULT_NODES if nodes is None else nodes
+    a, b = min(l, w), max(l, w)
+    return [
+        {"type": "block" if (bl, bw) == (l, w) else "block_rot", "x": x, "y": y, "l": bl, "w": bw}
+        for x, y, bl, bw in _pack(a, b, length, width, tuple(engines), nodes, budget)
+    ]
@@ -0,0 +1,111 @@
+"""多进程并行求解：把 (箱子, 托盘, 摆放方向, 算法) 任务分发到进程池
+
+子进程只回传紧凑的结果摘要（不含 layer_details），主进程按输入顺序汇总，
+需要明细或写入缓存时只对最优方向再求解一次（批量求解时在子进程中进行）。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import MISSING, canonical_box, canonical_key
+from .solver import SOLVERS, Box, Pallet
+
+
+def default_workers():
+    """默认进程数：可由环境变量 PALLETIZE_WORKERS 覆盖，否则使用全部 CPU"""
+    return int(os.environ.get("PALLETIZE_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _solve_task(task):
+    """子进程执行单个任务，返回 (总箱数, 层数, 利用率, 总体积) 或 None"""
+    box_dims, pallet_dims, orientation, algorithm = task
+    result = SOLVERS[algorithm](Box(*box_dims), Pallet(*pallet_dims), orientation)
+    if result is None:
+        return None
+    return (result["total_boxes"], result["layers"], result["utilization"], result["total_volume"])
+
+
+def _layout_task(task):
+    """子进程按指定方向求解，返回完整布局（层布局拼接的布局序列化时只传输去重后的层布局）"""
+    box_dims, pallet_dims, orientation, algorithm = task
+    return SOLVERS[algorithm](Box(*box_dims), Pallet(*pallet_dims), orientation)
+
+
+def _tasks(box, pallet, algorithms):
+    box_dims = (box.length, box.width, box.height)
+    pallet_dims = (pallet.length, pallet.width, pallet.max_height)
+    for algorithm in algorithms:
+        for orientation in box.get_rotations():
+            yield (box_dims, pallet_dims, orientation, algorithm)
+
+
+class ParallelSolver:
+    """基于进程池的并行求解器，结果顺序与输入顺序一致（可复现）"""
+    def __init__(self, workers=None, chunksize=None):
+        self.workers = workers or default_workers()
+        self.chunksize = chunksize
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map_tasks(self, tasks, func=_solve_task):
+        """按输入顺序返回每个任务的结果，func 须为模块级函数（默认返回紧凑结果）"""
+        tasks = list(tasks)
+        if self._executor is None:
+            return [func(task) for task in tasks]
+        # 每个进程分到若干块任务，减少进程间通信次数
+        chunksize = self.chunksize or max(1, len(tasks) // (self.workers * 4))
+        return list(self._executor.map(func, tasks, chunksize=chunksize))
+
+    def layouts(self, tasks):
+        """按 (箱子尺寸, 托盘尺寸, 摆放方向, 算法) 在子进程中求解完整布局，顺序与输入一致"""
+        return self.map_tasks(tasks, _layout_task)
+
+    def best_orientations(self, pairs, algorithms=tuple(SOLVERS)):
+        """对每个 (箱子, 托盘) 返回 {算法: (最优方向, 紧凑结果)}，与 best_layout 的取舍规则一致"""
+        pairs = list(pairs)
+        tasks = [task for box, pallet in pairs for task in _tasks(box, pallet, algorithms)]
+        results = iter(zip(tasks, self.map_tasks(tasks)))
+        best = []
+        for box, pallet in pairs:
+            entry = {}
+            for algorithm in algorithms:
+                chosen = None
+                for _ in box.get_rotations():
+                    task, result = next(results)
+                    if result and (chosen is None or result[0] > chosen[1][0]):
+                        chosen = (task[2], result)
+                entry[algorithm] = chosen
+            best.append(entry)
+        return best
+
+    def best_layouts(self, box, pallet, algorithms=tuple(SOLVERS), cache=None):
+        """并行比较所有方向，只对最优方向在本地重新求解得到完整明细
+
+        传入 cache 时先查缓存，仅对未命中的算法分发任务，并把结果写回缓存。
+        """
+        layouts = {}
+        pending = []
+        for algorithm in algorithms:
+            cached = MISSING if cache is None else cache.get(canonical_key(box, pallet, algorithm))
+            if cached is MISSING:
+                pending.append(algorithm)
+            else:
+                layouts[algorithm] = cached
+        if pending:
+            # 与 LayoutCache.best_layout 一致，使用规范化的箱子求解
+            target = box if cache is None else canonical_box(box)
+            entry = self.best_orientations([(target, pallet)], pending)[0]
+            for algorithm, chosen in entry.items():
+                layout = None if chosen is None else SOLVERS[algorithm](target, pallet, chosen[0])
+                if cache is not None:
+                    cache.put(canonical_key(box, pallet, algorithm), layout)
+                layouts[algorithm] = layout
+        return {algorithm: layouts[algorithm] for algorithm in algorithms}
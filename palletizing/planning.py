@@ -0,0 +1,63 @@
+"""订单装载规划：把一个 SKU 的订单数量拆分到多个托盘（可选再排到卡车底板上）
+
+满托盘的布局只求解一次，所有满托盘共享同一个 Layout；尾托盘直接取满托盘布局的前 n 个箱子
+（下面各层完整，最上层不满），不需要再次求解。结果通过生成器逐个托盘返回，
+界面和命令行可以在规划完成前先显示前面的托盘。
+"""
+from .cache import default_cache
+from .packing import pack_layer
+from .trace import span
+
+
+def truck_slots(pallet, truck_length, truck_width):
+    """卡车底板上的托盘位置 [(x, y, 是否旋转 90°)]，用单层装箱引擎排布托盘底面"""
+    return [(slot["x"], slot["y"], slot["type"] == "block_rot")
+            for slot in pack_layer(pallet.length, pallet.width, truck_length, truck_width)]
+
+
+def plan_order(box, pallet, quantity, algorithms=("improved", "block"), cache=None, truck=None, trace=None):
+    """逐个托盘生成装载计划 dict：托盘序号、箱数、是否满托、布局，以及指定卡车时的车号和位置
+
+    满托盘使用 algorithms 中箱数最多的方案；truck 为卡车底板的 (长, 宽)。
+    箱子无法放入托盘或托盘无法放上卡车时抛出 ValueError。
+    """
+    cache = default_cache() if cache is None else cache
+    with span(trace, "plan.solve", algorithms=list(algorithms)):
+        layouts = [cache.best_layout(box, pallet, name, trace) for name in algorithms]
+    full = max((layout for layout in layouts if layout), key=lambda layout: layout["total_boxes"], default=None)
+    if full is None:
+        raise ValueError("箱子无法放入托盘")
+    slots = None
+    if truck is not None:
+        slots = truck_slots(pallet, *truck)
+        if not slots:
+            raise ValueError("托盘无法放上卡车")
+
+    full_pallets, rest = divmod(int(quantity), full["total_boxes"])
+    remainder = full.head(rest) if rest else None
+    for index in range(full_pallets + (1 if rest else 0)):
+        layout = full if index < full_pallets else remainder
+        plan = {
+            "pallet": index + 1,
+            "boxes": layout["total_boxes"],
+            "layers": layout["layers"],
+            "utilization": layout["utilization"],
+            "full": index < full_pallets,
+            "layout": layout,
+        }
+        if slots is not None:
+            truck_index, slot = divmod(index, len(slots))
+            x, y, rotated = slots[slot]
+            plan.update(truck=truck_index + 1, position=(x, y), rotated=rotated)
+        yield plan
+
+
+def plan_summary(plans):
+    """汇总装载计划：托盘数、满托数、总箱数和卡车数"""
+    summary = {"pallets": 0, "full_pallets": 0, "boxes": 0, "trucks": 0}
+    for plan in plans:
+        summary["pallets"] += 1
+        summary["full_pallets"] += plan["full"]
+        summary["boxes"] += plan["boxes"]
+        summary["trucks"] = max(summary["trucks"], plan.get("truck", 0))
+    return summary
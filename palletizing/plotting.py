@@ -0,0 +1,357 @@
+"""绘图：2D 层布局、3D 堆码图、堆高曲线和方案对比（matplotlib）
+
+只在需要绘图时导入；中文字体在第一次绘图时注册，字体文件缺失时使用系统中已安装的中文字体，
+不会导致导入或绘图失败。求解核心不依赖本模块。
+"""
+import logging
+import os
+
+import matplotlib.font_manager as fm
+import matplotlib.pyplot as plt
+import numpy as np
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from .export import render_figure
+from .layout import Layout
+
+logger = logging.getLogger("palletizing.plotting")
+
+# 中文字体文件，可用环境变量 PALLETIZE_FONT 指定
+FONT_PATH = os.environ.get(
+    "PALLETIZE_FONT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "font", "MSYH.TTC"))
+
+# 字体文件不可用时依次尝试的系统中文字体
+FALLBACK_FONTS = ("Microsoft YaHei", "SimHei", "PingFang SC", "Noto Sans CJK SC",
+                  "Source Han Sans SC", "WenQuanYi Micro Hei")
+
+_font_ready = False
+
+
+def setup_font():
+    """注册中文字体，每个进程只在第一次绘图时执行一次"""
+    global _font_ready
+    if _font_ready:
+        return
+    _font_ready = True
+    installed = {font.name for font in fm.fontManager.ttflist}
+    families = []
+    try:
+        fm.fontManager.addfont(FONT_PATH)
+        families.append(fm.FontProperties(fname=FONT_PATH).get_name())
+    except (OSError, RuntimeError, ValueError):
+        logger.warning("无法加载字体文件 %s，改用系统字体，中文可能无法正常显示", FONT_PATH)
+    # 只列出已安装的字体，避免 matplotlib 对每个缺失的字体发出警告
+    families += [name for name in FALLBACK_FONTS if name in installed and name not in families]
+    plt.rcParams['font.family'] = 'sans-serif'
+    plt.rcParams['font.sans-serif'] = families + list(plt.rcParams['font.sans-serif'])
+    plt.rcParams['axes.unicode_minus'] = False # 解决负号显示问题
+
+
+def figure_png(fig, dpi=200):
+    """把图渲染为 PNG 字节后关闭（默认与 st.pyplot 相同的 dpi 和裁边）"""
+    try:
+        return render_figure(fig, "png", dpi=dpi)
+    finally:
+        plt.close(fig)
+
+
+def plot_2d_layout(pallet, layer_info, layers=None):
+    """生成2D层布局图，layers 为采用同一布局的所有层号（用于标题）"""
+    setup_font()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    
+    # 绘制托盘边界
+    ax.add_patch(plt.Rectangle((0, 0), pallet.length, pallet.width, 
+                                fill=False, edgecolor='black', linewidth=2))
+    
+    # 颜色配置
+    color_map = {
+        "main": "#4ECDC4",     # 青绿色 - 主排列
+        "extra_x": "#FFD166",  # 黄色 - 横向剩余
+        "extra_x_rot": "#A7C957",  # 浅绿 - 横向旋转
+        "extra_y": "#FF9A76",   # 橙色 - 纵向剩余
+        "extra_y_rot": "#BDD5EA",   # 浅蓝 - 纵向旋转
+        "block": "#4ECDC4",    # 青绿色 - 块状排列
+        "block_rot": "#F4A261"   # 橙黄 - 块状旋转
+    }
+    
+    # 混装堆码的箱子类型为 SKU 名称，按 SKU 着色
+    skus = sku_colors(color_map, [box["type"] for box in layer_info["box_positions"]])
+    color_map.update(skus)
+    
+    # 绘制每个箱子并添加标注
+    for box in layer_info["box_positions"]:
+        box_type = box["type"] if box["type"] in color_map else "main"
+        ax.add_patch(plt.Rectangle(
+            (box["x"], box["y"]), 
+            box["l"], 
+            box["w"],
+            facecolor=color_map[box_type],
+            edgecolor='black',
+            alpha=0.8
+        ))
+        
+        # 添加尺寸标注
+        label = f"{box['l']}×{box['w']}"
+        ax.text(box["x"] + box["l"]/2, box["y"] + box["w"]/2, 
+                label, ha='center', va='center', fontsize=8, color='black')
+        
+        # 如果是旋转放置，添加旋转标记
+        if "_rot" in box["type"]:
+            ax.text(box["x"] + box["l"]/2, box["y"] + box["w"]/2, 
+                    "旋转", ha='center', va='center', fontsize=10, color='red', weight='bold', alpha=0.9)
+    
+    # 添加比例箭头
+    arrow_length = min(pallet.length, pallet.width) * 0.2
+    ax.arrow(5, 5, arrow_length, 0, head_width=3, head_length=5, fc='k', ec='k')
+    ax.arrow(5, 5, 0, arrow_length, head_width=3, head_length=5, fc='k', ec='k')
+    ax.text(5 + arrow_length/2, 2, '长度 (cm)', ha='center')
+    ax.text(2, 5 + arrow_length/2, '宽度 (cm)', ha='center', rotation='vertical')
+    
+    # 设置坐标轴范围
+    ax.set_xlim(-0.05 * pallet.length, pallet.length * 1.05)
+    ax.set_ylim(-0.05 * pallet.width, pallet.width * 1.05)
+    
+    # 计算利用率
+    used_area = sum(box["l"] * box["w"] for box in layer_info["box_positions"])
+    layer_utilization = used_area / (pallet.length * pallet.width)
+    
+    ax.set_title(f"第{layer_label(layers or [layer_info['layer']])}层 - 箱数: {len(layer_info['box_positions'])} - 利用率: {layer_utilization*100:.1f}%", 
+                fontsize=12)
+    ax.set_aspect('equal')
+    ax.grid(True, linestyle='--', alpha=0.3)
+    
+    # 添加图例
+    from matplotlib.patches import Patch
+    legend_elements = [
+        Patch(facecolor=color_map['main'], label='主排列'),
+        Patch(facecolor=color_map['extra_x'], label='横向补充'),
+        Patch(facecolor=color_map['extra_x_rot'], label='横向旋转'),
+        Patch(facecolor=color_map['extra_y'], label='纵向补充'),
+        Patch(facecolor=color_map['extra_y_rot'], label='纵向旋转')
+    ]
+    if any(box["type"] == "block_rot" for box in layer_info["box_positions"]):
+        legend_elements.append(Patch(facecolor=color_map['block_rot'], label='块状旋转'))
+    if skus:
+        legend_elements = [Patch(facecolor=color, label=sku) for sku, color in skus.items()]
+    ax.legend(handles=legend_elements, loc='upper right')
+    
+    plt.tight_layout()
+    return fig
+
+
+def layer_label(layers):
+    """层号列表的简短描述，如 1、3、5 或 1、3、5…19（共10层）"""
+    if len(layers) <= 4:
+        return "、".join(map(str, layers))
+    return f"{'、'.join(map(str, layers[:3]))}…{layers[-1]}（共{len(layers)}层）"
+
+
+def sku_colors(color_map, box_types):
+    """为 color_map 中没有的箱子类型（混装堆码的 SKU）按出现顺序分配颜色"""
+    from matplotlib.colors import to_hex
+    palette = plt.get_cmap('tab20').colors
+    skus = [t for t in dict.fromkeys(box_types) if t not in color_map]
+    return {sku: to_hex(palette[i % len(palette)]) for i, sku in enumerate(skus)}
+
+
+# 六面体的 6 个面（顶点编号见 _cuboid_faces）：前、右、后、左、顶、底
+CUBOID_FACES = np.array([
+    [0, 1, 5, 4],  # 前面
+    [1, 2, 6, 5],  # 右面
+    [2, 3, 7, 6],  # 后面
+    [3, 0, 4, 7],  # 左面
+    [4, 5, 6, 7],  # 顶面
+    [0, 1, 2, 3]   # 底面
+])
+
+
+def _box_columns(layout):
+    """取出所有箱子的 x, y, z, l, w, h 数组和类型名"""
+    if isinstance(layout, Layout):
+        columns = [layout.columns[name].astype(float) for name in ("x", "y", "z", "l", "w", "h")]
+        return columns, layout.box_types()
+    rows, types = [], []
+    h = layout["orientation"][2]
+    for layer_info in layout["layer_details"]:
+        layer_z = (layer_info["layer"] - 1) * h
+        for box in layer_info["box_positions"]:
+            rows.append((box["x"], box["y"], layer_z, box["l"], box["w"], h))
+            types.append(box["type"])
+    columns = np.asarray(rows, dtype=float).reshape(-1, 6).T
+    return list(columns), np.asarray(types, dtype=object)
+
+
+def _cuboid_faces(x, y, z, l, w, h):
+    """一次性生成所有箱子的面，返回 (N, 6, 4, 3) 数组"""
+    x1, y1, z1 = x + l, y + w, z + h
+    v = np.stack([
+        np.stack([x, y, z], -1), np.stack([x1, y, z], -1), np.stack([x1, y1, z], -1), np.stack([x, y1, z], -1),
+        np.stack([x, y, z1], -1), np.stack([x1, y, z1], -1), np.stack([x1, y1, z1], -1), np.stack([x, y1, z1], -1)
+    ], axis=1)
+    return v[:, CUBOID_FACES]
+
+
+def _matched_rows(keys, others):
+    """keys 中每一行是否在 others 中出现（按整行精确匹配）"""
+    def as_void(a):
+        a = np.ascontiguousarray(a, dtype=float)
+        return a.view(np.dtype((np.void, a.dtype.itemsize * a.shape[1]))).ravel()
+    return np.isin(as_void(keys), as_void(others))
+
+
+def _hidden_faces(x, y, z, l, w, h):
+    """剔除相邻箱子之间完全贴合的面，返回 (N, 6) 的遮挡掩码"""
+    hidden = np.zeros((len(x), 6), dtype=bool)
+    # 前/后面：同一高度、同一 x 区间，前面 y 与另一个箱子的后面 y+w 重合
+    front = np.stack([z, h, y, x, l], 1)
+    back = np.stack([z, h, y + w, x, l], 1)
+    hidden[:, 0] = _matched_rows(front, back)
+    hidden[:, 2] = _matched_rows(back, front)
+    # 左/右面
+    left = np.stack([z, h, x, y, w], 1)
+    right = np.stack([z, h, x + l, y, w], 1)
+    hidden[:, 3] = _matched_rows(left, right)
+    hidden[:, 1] = _matched_rows(right, left)
+    # 顶/底面：上下层箱子底面与顶面完全重合
+    top = np.stack([z + h, x, y, l, w], 1)
+    bottom = np.stack([z, x, y, l, w], 1)
+    hidden[:, 4] = _matched_rows(top, bottom)
+    hidden[:, 5] = _matched_rows(bottom, top)
+    return hidden
+
+
+def plot_3d_layout(pallet, layout):
+    """生成3D可视化图形（所有箱子的可见面合并为一个 Poly3DCollection）"""
+    setup_font()
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+    
+    # 绘制托盘
+    tray = Poly3DCollection([
+        [(0, 0, 0), (pallet.length, 0, 0), (pallet.length, pallet.width, 0), (0, pallet.width, 0)]
+    ])
+    tray.set_facecolor('#CCCCCC')
+    tray.set_alpha(0.5)
+    tray.set_edgecolor('k')
+    ax.add_collection3d(tray)
+    
+    # 颜色配置
+    color_map = {
+        "main": "#4ECDC4",     # 青绿色
+        "extra_x": "#4ECDC4",  # 青绿色
+        "extra_x_rot": "#A7C957",  # 浅绿
+        "extra_y": "#4ECDC4",   # 青绿色
+        "extra_y_rot": "#BDD5EA",   # 浅蓝
+        "block": "#4ECDC4",    # 青绿色
+        "block_rot": "#F4A261"   # 橙黄
+    }
+    
+    # 批量生成所有箱子的面，并剔除被相邻箱子遮挡的面
+    (x, y, z, l, w, h), box_types = _box_columns(layout)
+    if len(x):
+        faces = _cuboid_faces(x, y, z, l, w, h)
+        visible = ~_hidden_faces(x, y, z, l, w, h)
+        skus = sku_colors(color_map, box_types)
+        color_map.update(skus)
+        box_colors = np.array([color_map.get(t, "#4ECDC4") for t in box_types], dtype=object)
+        face_colors = np.repeat(box_colors[:, None], 6, axis=1)[visible]
+        cubes = Poly3DCollection(faces[visible], facecolors=list(face_colors),
+                                 edgecolor='k', alpha=0.85, linewidths=0.8)
+        ax.add_collection3d(cubes)
+    
+        if skus:
+            from matplotlib.patches import Patch
+            ax.legend(handles=[Patch(facecolor=color, label=sku) for sku, color in skus.items()],
+                      loc='upper left', fontsize=8)
+    
+    # 坐标轴设置
+    ax.set_xlim(0, pallet.length * 1.1)
+    ax.set_ylim(0, pallet.width * 1.1)
+    max_z = min(pallet.max_height, float((z + h).max()) if len(z) else 0)
+    ax.set_zlim(0, max_z * 1.1)
+    
+    ax.set_xlabel('托盘长度 (cm)', labelpad=15)
+    ax.set_ylabel('托盘宽度 (cm)', labelpad=15)
+    ax.set_zlabel('堆码高度 (cm)', labelpad=15)
+    
+    # 添加标题
+    ax.set_title(
+        f"总箱数: {layout['total_boxes']} / 堆码层数: {layout['layers']}",
+        pad=20
+    )
+    
+    # 设置视角
+    ax.view_init(elev=35, azim=-50)
+    ax.set_box_aspect([pallet.length, pallet.width, max_z])
+    
+    plt.tight_layout()
+    return fig
+
+
+def visualize_optimization(box, pallet, original, optimized):
+    """显示优化前后对比"""
+    setup_font()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    
+    # 原方案
+    ax1.barh(['总箱数', '利用率(%)', '层数'], 
+                [original['total_boxes'], original['utilization']*100, original['layers']],
+                color=['#4ECDC4', '#FF9A76', '#FFD166'])
+    ax1.set_title('原方案结果')
+    ax1.set_xlim(0, max(100, original['total_boxes']*1.3, original['utilization']*100 * 1.3))
+    ax1.grid(axis='x', linestyle='--', alpha=0.3)
+    ax1.set_xlabel('数值')
+    
+    # 优化方案
+    ax2.barh(['总箱数', '利用率(%)', '层数'], 
+                [optimized['total_boxes'], optimized['utilization']*100, optimized['layers']],
+                color=['#4ECDC4', '#FF9A76', '#FFD166'])
+    ax2.set_title('优化后方案')
+    ax2.set_xlim(0, max(100, optimized['total_boxes']*1.3, optimized['utilization']*100 * 1.3))
+    ax2.grid(axis='x', linestyle='--', alpha=0.3)
+    ax2.set_xlabel('数值')
+    
+    # 添加数值标签
+    for ax, data in zip([ax1, ax2], [original, optimized]):
+        for i, (k, v) in enumerate(data.items()):
+            if k not in ['total_boxes', 'utilization', 'layers']:
+                continue
+            if k == 'utilization':
+                ax.text(v*100, i, f"{v*100:.1f}%", ha='left', va='center', fontsize=12)
+            else:
+                ax.text(v, i, str(v), ha='left', va='center', fontsize=12)
+    
+    fig.suptitle(f"优化效果对比 (箱子尺寸: {box.length}×{box.width}×{box.height}cm | 托盘: {pallet.length}×{pallet.width}×{pallet.max_height}cm)", 
+                    fontsize=14)
+    plt.tight_layout()
+    return fig
+
+
+def plot_height_curve(curve, current_height):
+    """堆高-利用率曲线，标出利用率最高的堆高"""
+    setup_font()
+    heights, boxes, utilization = zip(*curve)
+    fig, ax1 = plt.subplots(figsize=(10, 4))
+    
+    ax1.plot(heights, [u * 100 for u in utilization], color='#4ECDC4', linewidth=2)
+    ax1.set_xlabel('最大堆高 (cm)')
+    ax1.set_ylabel('空间利用率 (%)', color='#2A9D8F')
+    ax1.grid(True, linestyle='--', alpha=0.3)
+    
+    # 总箱数随堆高阶梯变化
+    ax2 = ax1.twinx()
+    ax2.step(heights, boxes, where='post', color='#FF9A76', alpha=0.8)
+    ax2.set_ylabel('总箱数', color='#E76F51')
+    
+    # 标出利用率最高的堆高和当前设置
+    best = max(range(len(curve)), key=lambda i: utilization[i])
+    ax1.axvline(heights[best], color='red', linestyle='--', alpha=0.6)
+    ax1.text(heights[best], utilization[best] * 100, f" 最佳堆高 {heights[best]}cm ({utilization[best]*100:.1f}%)",
+             color='red', va='bottom', fontsize=10)
+    ax1.axvline(current_height, color='gray', linestyle=':', alpha=0.8)
+    
+    ax1.set_title('堆高-利用率曲线')
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,462 @@
+"""纵横式堆码求解核心（不依赖 streamlit / matplotlib）"""
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import numpy as np
+
+from .layout import Layout, pattern_columns
+from .packing import _fit, pack_layer
+from .trace import span
+
+# 算法版本号，布局结果或结果格式发生变化时递增（用作缓存键的一部分）
+SOLVER_VERSION = 5
+
+# 浮点坐标比较的容差
+_EPS = 1e-9
+
+
+class Box:
+    def __init__(self, length, width, height):
+        self.length = length
+        self.width = width
+        self.height = height
+        self.volume = length * width * height
+        
+    def get_rotations(self):
+        """获取所有可能的摆放方向"""
+        return [
+            (self.length, self.width, self.height),
+            (self.width, self.length, self.height),
+            (self.length, self.height, self.width),
+            (self.height, self.length, self.width),
+            (self.width, self.height, self.length),
+            (self.height, self.width, self.length)
+        ]
+
+class Pallet:
+    def __init__(self, length, width, max_height):
+        self.length = length
+        self.width = width
+        self.max_height = max_height
+        self.volume = length * width * max_height
+
+def _positive(orientation, pallet):
+    """箱子和托盘尺寸都为正数时才可求解"""
+    return min(*orientation, pallet.length, pallet.width, pallet.max_height) > 0
+
+class CompressedGrid:
+    """坐标压缩栅格：栅格线只取已放置矩形的边，每个单元要么整体被占用、要么整体空闲
+
+    与查询矩形内部相交的单元全部空闲即不重叠、全部被占用即完全覆盖，因此判断是精确的，
+    与尺寸精度无关（支持小数和毫米尺寸）；栅格大小只随矩形数增长，不随托盘面积增长。
+    单元按列保存为 bytearray，查询的区域通常只有几个单元，比 numpy 切片的调用开销小。
+    """
+    def __init__(self, length, width):
+        self.xs = [0, length]
+        self.ys = [0, width]
+        self.columns = [bytearray(1)]
+
+    def _split(self, points, value, axis):
+        """在 value 处加入栅格线（被切开的单元复制一份），返回栅格线下标"""
+        i = bisect_left(points, value - _EPS)
+        if i < len(points) and points[i] - value <= _EPS:
+            return i
+        points.insert(i, value)
+        if axis == 0:
+            self.columns.insert(i, bytearray(self.columns[i - 1]))
+        else:
+            for column in self.columns:
+                column.insert(i, column[i - 1])
+        return i
+
+    def _span(self, x0, y0, x1, y1):
+        xs, ys = self.xs, self.ys
+        return (bisect_right(xs, x0 + _EPS) - 1, bisect_left(xs, x1 - _EPS),
+                bisect_right(ys, y0 + _EPS) - 1, bisect_left(ys, y1 - _EPS))
+
+    def covers(self, x0, y0, x1, y1):
+        """矩形是否被完全覆盖"""
+        i0, i1, j0, j1 = self._span(x0, y0, x1, y1)
+        for column in self.columns[i0:i1]:
+            if 0 in column[j0:j1]:
+                return False
+        return True
+
+    def intersects(self, x0, y0, x1, y1):
+        """矩形内部是否与已占用的单元相交"""
+        i0, i1, j0, j1 = self._span(x0, y0, x1, y1)
+        for column in self.columns[i0:i1]:
+            if 1 in column[j0:j1]:
+                return True
+        return False
+
+    def fill(self, x0, y0, x1, y1):
+        i0, i1 = self._split(self.xs, x0, 0), self._split(self.xs, x1, 0)
+        j0, j1 = self._split(self.ys, y0, 1), self._split(self.ys, y1, 1)
+        filled = b"\x01" * (j1 - j0)
+        for column in self.columns[i0:i1]:
+            column[j0:j1] = filled
+
+
+class LayerGrid:
+    """单层占用情况：本层已放置箱子与上一层箱子（支撑面）各用一个坐标压缩栅格表示"""
+    def __init__(self, pallet, support=None):
+        self.pallet = pallet
+        self.occupied = CompressedGrid(pallet.length, pallet.width)
+        # support 为 None 表示托盘底面（第一层全支撑）
+        self.support = support
+
+    @staticmethod
+    def cells(x, y, l, w):
+        """箱子底面范围 (x0, y0, x1, y1)"""
+        return x, y, x + l, y + w
+
+    def is_supported(self, x0, y0, x1, y1):
+        """箱子底面是否被上一层完全支撑"""
+        return self.support is None or self.support.covers(x0, y0, x1, y1)
+
+    def is_free(self, x0, y0, x1, y1):
+        """箱子底面是否与本层已放置的箱子重叠（仅边界相接不算重叠）"""
+        return not self.occupied.intersects(x0, y0, x1, y1)
+
+    def occupy(self, x0, y0, x1, y1):
+        self.occupied.fill(x0, y0, x1, y1)
+
+    def next_layer(self):
+        """以本层占用情况作为支撑，生成上一层的占用表示"""
+        return LayerGrid(self.pallet, support=self.occupied)
+
+def place_box(x, y, l, w, layer_info, grid, box_type):
+    """尝试放置箱子，并更新本层占用情况"""
+    # 检查是否超出托盘边界
+    if x + l > grid.pallet.length + _EPS or y + w > grid.pallet.width + _EPS:
+        return False
+    
+    cells = grid.cells(x, y, l, w)
+    # 检查支撑条件（整个底面都需要被下层箱子支撑）
+    if not grid.is_supported(*cells):
+        return False
+    
+    # 检查是否与其他箱子重叠
+    if not grid.is_free(*cells):
+        return False
+    
+    # 通过所有检查，放置箱子
+    layer_info["box_positions"].append({
+        "type": box_type,
+        "x": x,
+        "y": y,
+        "l": l,
+        "w": w
+    })
+    grid.occupy(*cells)
+    
+    return True
+
+def fill_layer(l, w, pallet, layer_count, grid, layer_info):
+    """按纵横交替规则填充一层：主排列 + 右侧/上方剩余空间（含旋转放置）"""
+    # 确定当前层的方向（交替变化）
+    if layer_count % 2 == 0:
+        layer_length = l
+        layer_width = w
+    else:
+        layer_length = w
+        layer_width = l
+    
+    # 计算主方向排列
+    x_num = _fit(pallet.length, layer_length)
+    y_num = _fit(pallet.width, layer_width)
+    
+    # 放置主排列箱子
+    for x in range(x_num):
+        for y in range(y_num):
+            x_pos = x * layer_length
+            y_pos = y * layer_width
+            place_box(x_pos, y_pos, layer_length, layer_width, layer_info, grid, "main")
+    
+    # 计算剩余空间
+    x_remain = pallet.length - x_num * layer_length
+    y_remain = pallet.width - y_num * layer_width
+    
+    # 横向剩余空间利用（右侧区域）
+    if x_remain > 0 and y_num > 0:
+        x_start = x_num * layer_length
+        
+        # 剩余宽度放得下旋转 90° 的箱子时，沿 y 方向按箱子长度排一列
+        if x_remain + _EPS >= layer_width:
+            for y in range(_fit(pallet.width, layer_length)):
+                y_pos = y * layer_length
+                place_box(x_start, y_pos, layer_width, layer_length, layer_info, grid, "extra_x")
+        
+        # 尝试旋转方向
+        for rotation in [(w, l), (l, w)]:
+            rot_l, rot_w = rotation
+            if rot_l <= x_remain + _EPS and (rot_w <= layer_width or layer_count == 0):
+                for y in range(y_num):
+                    y_pos = y * layer_width
+                    place_box(x_start, y_pos, rot_l, rot_w, layer_info, grid, "extra_x_rot")
+    
+    # 纵向剩余空间利用（上方区域）
+    if y_remain > 0 and x_num > 0:
+        y_start = y_num * layer_width
+        
+        # 剩余高度放得下旋转 90° 的箱子时，沿 x 方向按箱子宽度排一行
+        if y_remain + _EPS >= layer_length:
+            for x in range(_fit(pallet.length, layer_width)):
+                x_pos = x * layer_width
+                place_box(x_pos, y_start, layer_width, layer_length, layer_info, grid, "extra_y")
+        
+        # 尝试旋转方向
+        for rotation in [(w, l), (l, w)]:
+            rot_l, rot_w = rotation
+            if rot_w <= y_remain + _EPS and (rot_l <= layer_length or layer_count == 0):
+                for x in range(x_num):
+                    x_pos = x * layer_length
+                    place_box(x_pos, y_start, rot_l, rot_w, layer_info, grid, "extra_y_rot")
+
+class LayerSequence:
+    """给定层内箱子尺寸 (l, w) 和托盘长宽的逐层布局序列，与最大堆高无关
+
+    第 k 层的布局只取决于层的奇偶和第 k-1 层的布局（支撑区域），因此序列
+    必然进入周期。预先求出前缀和周期后，任意堆高的结果都可以直接拼出。
+    """
+    def __init__(self, l, w, length, width):
+        self.l = l
+        self.w = w
+        self.patterns = []   # 互不相同的层布局（列数组）
+        self.order = []      # 前缀 + 一个周期内各层使用的布局下标
+        self.cycle_start = None  # None 表示序列在 len(order) 层后终止
+        
+        pallet = Pallet(length, width, 0)
+        interned = {}
+        seen = {}
+        grid = LayerGrid(pallet)  # 第一层由托盘底部全支撑
+        previous = None
+        layer_count = 0
+        while True:
+            # 状态 = (层奇偶, 上一层布局)，状态重复即进入周期
+            state = (layer_count % 2, previous)
+            if state in seen:
+                self.cycle_start = seen[state]
+                break
+            seen[state] = layer_count
+            
+            layer_info = {"box_positions": []}
+            fill_layer(l, w, pallet, layer_count, grid, layer_info)
+            if not layer_info["box_positions"]:
+                break  # 无法放置更多层时终止
+            
+            key = tuple(tuple(box.values()) for box in layer_info["box_positions"])
+            if key not in interned:
+                interned[key] = len(self.patterns)
+                self.patterns.append(pattern_columns(layer_info["box_positions"]))
+            previous = interned[key]
+            self.order.append(previous)
+            layer_count += 1
+            # 本层占用区域即为下一层的支撑区域
+            grid = grid.next_layer()
+        
+        self._counts = np.array([len(self.patterns[i]["x"]) for i in self.order], dtype=np.int64)
+        self._areas = np.array([self.patterns[i]["area"] for i in self.order], dtype=float)
+
+    def layer_indices(self, max_layers):
+        """前 max_layers 层（不超过序列终止处）各层使用的布局下标"""
+        if self.cycle_start is None or max_layers <= len(self.order):
+            return self.order[:max_layers]
+        period = self.order[self.cycle_start:]
+        extra = max_layers - len(self.order)
+        return self.order + (period * (extra // len(period) + 1))[:extra]
+
+    def totals(self, max_layers):
+        """前 max_layers 层的 (层数, 总箱数, 总底面积)，O(1)"""
+        prefix = min(max_layers, len(self.order))
+        layers = prefix
+        boxes = int(self._counts[:prefix].sum())
+        area = float(self._areas[:prefix].sum())
+        if self.cycle_start is not None and max_layers > len(self.order):
+            extra = max_layers - len(self.order)
+            counts = self._counts[self.cycle_start:]
+            areas = self._areas[self.cycle_start:]
+            full, rest = divmod(extra, len(counts))
+            layers += extra
+            boxes += full * int(counts.sum()) + int(counts[:rest].sum())
+            area += full * float(areas.sum()) + float(areas[:rest].sum())
+        return layers, boxes, area
+
+@lru_cache(maxsize=512)
+def layer_sequence(l, w, length, width):
+    """按 (箱子底面尺寸, 托盘长宽) 缓存的层布局序列"""
+    return LayerSequence(l, w, length, width)
+
+def calculate_alternating_layout(box, pallet, orientation):
+    """改进的纵横式堆码算法，支持剩余空间旋转放置
+
+    层布局序列按托盘长宽缓存，只修改最大堆高时不会重新计算各层布局。
+    """
+    l, w, h = orientation
+    if not _positive(orientation, pallet) or h > pallet.max_height + _EPS:
+        return None
+    
+    sequence = layer_sequence(l, w, pallet.length, pallet.width)
+    indices = sequence.layer_indices(_fit(pallet.max_height, h))
+    if not indices:
+        return None
+    layer_count, total_boxes, area = sequence.totals(len(indices))
+    total_volume = area * h
+    
+    # 计算空间利用率
+    pallet_volume = pallet.length * pallet.width * pallet.max_height
+    utilization = total_volume / pallet_volume
+    
+    return Layout.from_patterns({
+        "type": "改进纵横式堆码",
+        "orientation": orientation,
+        "total_boxes": total_boxes,
+        "layers": layer_count,
+        "utilization": min(utilization, 1.0),
+        "total_volume": total_volume,
+        "pallet_volume": pallet_volume
+    }, sequence.patterns, indices, h, (l, w, h))
+
+@lru_cache(maxsize=512)
+def block_pattern(l, w, length, width):
+    """单层装箱引擎求得的层布局（列数组），按 (箱子底面尺寸, 托盘长宽) 缓存"""
+    return pattern_columns(pack_layer(l, w, length, width))
+
+def calculate_block_layout(box, pallet, orientation):
+    """块状堆码：每层使用单层装箱引擎（一刀切 / 风车划分）求得的布局
+
+    各层布局相同，上层箱子由下层完全支撑；搜索受节点预算限制（结果可复现），见 packing.DEFAULT_NODES。
+    """
+    l, w, h = orientation
+    if not _positive(orientation, pallet) or h > pallet.max_height + _EPS:
+        return None
+    
+    pattern = block_pattern(l, w, pallet.length, pallet.width)
+    layer_count = _fit(pallet.max_height, h)
+    if not len(pattern["x"]) or layer_count == 0:
+        return None
+    total_volume = pattern["area"] * h * layer_count
+    
+    # 计算空间利用率
+    pallet_volume = pallet.length * pallet.width * pallet.max_height
+    utilization = total_volume / pallet_volume
+    
+    return Layout.from_patterns({
+        "type": "块状堆码",
+        "orientation": orientation,
+        "total_boxes": len(pattern["x"]) * layer_count,
+        "layers": layer_count,
+        "utilization": min(utilization, 1.0),
+        "total_volume": total_volume,
+        "pallet_volume": pallet_volume
+    }, [pattern], [0] * layer_count, h, (l, w, h))
+
+def height_curve(box, pallet, heights):
+    """不同最大堆高下改进算法的最优结果，返回 [(堆高, 总箱数, 利用率)]
+
+    直接使用缓存的层布局序列计数，不生成完整布局。
+    """
+    curve = []
+    for max_height in heights:
+        best_boxes, best_volume = 0, 0
+        for l, w, h in box.get_rotations():
+            if h > max_height or min(l, w, h, pallet.length, pallet.width) <= 0:
+                continue
+            sequence = layer_sequence(l, w, pallet.length, pallet.width)
+            _, boxes, area = sequence.totals(_fit(max_height, h))
+            if boxes > best_boxes:
+                best_boxes, best_volume = boxes, area * h
+        utilization = best_volume / (pallet.length * pallet.width * max_height)
+        curve.append((max_height, best_boxes, min(utilization, 1.0)))
+    return curve
+
+def calculate_alternating_layout_original(box, pallet, orientation):
+    """原始纵横式堆码算法（用于对比）"""
+    l, w, h = orientation
+    if not _positive(orientation, pallet) or h > pallet.max_height:
+        return None
+    
+    total_boxes = 0
+    current_z = 0
+    layer_count = 0
+    layout_details = []
+    total_volume = 0
+    
+    while current_z + h <= pallet.max_height:
+        # 确定当前层的方向（交替变化）
+        if layer_count % 2 == 0:
+            layer_length = l
+            layer_width = w
+        else:
+            layer_length = w
+            layer_width = l
+
+        layer_info = {
+            "layer": layer_count + 1,
+            "orientation": (layer_length, layer_width, h),
+            "box_positions": []
+        }
+
+        # 计算主方向排列
+        x_num = int(pallet.length // layer_length)
+        y_num = int(pallet.width // layer_width)
+        
+        # 放置主排列箱子
+        for x in range(x_num):
+            for y in range(y_num):
+                x_pos = x * layer_length
+                y_pos = y * layer_width
+                
+                layer_info["box_positions"].append({
+                    "type": "main",
+                    "x": x_pos,
+                    "y": y_pos,
+                    "l": layer_length,
+                    "w": layer_width
+                })
+                total_boxes += 1
+
+        # 计算当前层体积
+        if layer_info["box_positions"]:
+            layer_volume = len(layer_info["box_positions"]) * layer_length * layer_width * h
+            total_volume += layer_volume
+            layout_details.append(layer_info)
+            current_z += h
+            layer_count += 1
+        else:
+            break
+
+    if total_boxes == 0:
+        return None
+    
+    # 计算空间利用率
+    pallet_volume = pallet.length * pallet.width * pallet.max_height
+    utilization = total_volume / pallet_volume
+    
+    return Layout.from_layers({
+        "type": "原始纵横式堆码",
+        "orientation": orientation,
+        "total_boxes": total_boxes,
+        "layers": layer_count,
+        "utilization": min(utilization, 1.0),
+        "total_volume": total_volume,
+        "pallet_volume": pallet_volume
+    }, layout_details, h)
+
+# 可供批量求解选择的算法
+SOLVERS = {
+    "original": calculate_alternating_layout_original,
+    "improved": calculate_alternating_layout,
+    "block": calculate_block_layout,
+}
+
+def best_layout(box, pallet, solver=calculate_alternating_layout, trace=None):
+    """遍历箱子的所有摆放方向，返回总箱数最多的方案；传入 trace 时记录每个方向的耗时"""
+    best = None
+    for orient in box.get_rotations():
+        with span(trace, "solve.orientation", orientation=orient):
+            result = solver(box, pallet, orient)
+        if result and (best is None or result['total_boxes'] > best['total_boxes']):
+            best = result
+    return best
@@ -0,0 +1,117 @@
+"""稳定性与承重分析：对已完成的布局逐个箱子计算支撑比例、上方承重和层间交错情况
+
+按底面高度逐层处理：把相接触的上下两层箱子画到坐标压缩后的栅格上（栅格线只取这些箱子的边），
+每个单元同时记录下层和上层的箱子编号，用 bincount 按 (上箱, 下箱) 汇总接触面积。
+计算量只与箱数和每层的栅格大小有关，不做两两比较。
+"""
+import numpy as np
+
+# 浮点坐标比较的小数位数
+_DECIMALS = 9
+
+
+def _paint(xs, ys, x0, y0, x1, y1, values):
+    """在坐标压缩栅格上绘制互不重叠的矩形，返回每个单元的值（未覆盖的单元为 0）
+
+    用二维差分数组一次写入所有矩形的四个角，再做两次前缀和。
+    """
+    ix0, ix1 = np.searchsorted(xs, x0), np.searchsorted(xs, x1)
+    iy0, iy1 = np.searchsorted(ys, y0), np.searchsorted(ys, y1)
+    diff = np.zeros((len(xs), len(ys)), dtype=np.int64)
+    np.add.at(diff, (ix0, iy0), values)
+    np.add.at(diff, (ix1, iy0), -values)
+    np.add.at(diff, (ix0, iy1), -values)
+    np.add.at(diff, (ix1, iy1), values)
+    return diff.cumsum(axis=0).cumsum(axis=1)[:-1, :-1]
+
+
+def _contacts(x0, y0, x1, y1, lower, upper):
+    """上层箱子 upper 与下层箱子 lower 的接触，返回 (上箱下标, 下箱下标, 接触面积)"""
+    boxes = np.concatenate([lower, upper])
+    xs = np.unique(np.concatenate([x0[boxes], x1[boxes]]))
+    ys = np.unique(np.concatenate([y0[boxes], y1[boxes]]))
+    cell_area = np.diff(xs)[:, None] * np.diff(ys)[None, :]
+    below = _paint(xs, ys, x0[lower], y0[lower], x1[lower], y1[lower], np.arange(1, len(lower) + 1))
+    above = _paint(xs, ys, x0[upper], y0[upper], x1[upper], y1[upper], np.arange(1, len(upper) + 1))
+    touching = (below > 0) & (above > 0)
+    pairs = (above[touching] - 1) * len(lower) + (below[touching] - 1)
+    pairs, inverse = np.unique(pairs, return_inverse=True)
+    areas = np.bincount(inverse, weights=cell_area[touching])
+    return upper[pairs // len(lower)], lower[pairs % len(lower)], areas
+
+
+def analyze_stability(layout, box_weight=1.0):
+    """分析布局的稳定性和承重
+
+    box_weight 为单箱重量（标量，或与箱子一一对应的数组）；不指定时承重以箱数计。
+    返回 dict：
+      support_fraction  每个箱子底面被支撑的面积比例（底层为 1）
+      supporters        每个箱子下方直接支撑它的箱子数（底层为 0）
+      load              每个箱子承受的上方重量（按接触面积把重量分配给下方箱子）
+      pressure          load 除以箱子顶面面积
+      layers            各层的 [{"layer", "boxes", "min_support", "interlock", "column", "max_load"}]
+      summary           全托盘汇总
+    interlock 为压在两个及以上箱子上的比例（层间交错），column 为正好压在一个同尺寸箱子上的比例（柱式）。
+    """
+    x, y, z, l, w, h = (layout.columns[name].astype(np.float64) for name in ("x", "y", "z", "l", "w", "h"))
+    count = len(x)
+    weight = np.broadcast_to(np.asarray(box_weight, dtype=np.float64), (count,))
+    base = np.round(z, _DECIMALS)
+    top = np.round(z + h, _DECIMALS)
+    # 小数尺寸下相邻箱子的边可能相差一个舍入误差，取整后才不会被当作重叠
+    x0, y0 = np.round(x, _DECIMALS), np.round(y, _DECIMALS)
+    x1, y1 = np.round(x + l, _DECIMALS), np.round(y + w, _DECIMALS)
+    footprint = l * w
+
+    supported = np.where(base == 0, footprint, 0.0)
+    supporters = np.zeros(count, dtype=np.int64)
+    column = np.zeros(count, dtype=bool)
+    levels = []
+    for level in np.unique(base[base > 0]):
+        upper = np.flatnonzero(base == level)
+        lower = np.flatnonzero(top == level)
+        if not len(lower):
+            continue
+        ups, lows, areas = _contacts(x0, y0, x1, y1, lower, upper)
+        np.add.at(supported, ups, areas)
+        np.add.at(supporters, ups, 1)
+        same = (x0[ups] == x0[lows]) & (y0[ups] == y0[lows]) & (x1[ups] == x1[lows]) & (y1[ups] == y1[lows])
+        column[ups[same]] = True
+        levels.append((level, ups, lows, areas))
+
+    # 自上而下传递重量：上层箱子的自重和它承受的重量按接触面积分给下方箱子
+    load = np.zeros(count)
+    for _, ups, lows, areas in reversed(levels):
+        share = np.divide(areas, supported[ups], out=np.zeros_like(areas), where=supported[ups] > 0)
+        np.add.at(load, lows, (weight[ups] + load[ups]) * share)
+
+    support_fraction = np.minimum(supported / footprint, 1.0)
+    column &= supporters == 1
+    interlock = supporters >= 2
+    layers = []
+    for index in range(layout.layer_count):
+        rows = layout.layer_slice(index)
+        layers.append({
+            "layer": index + 1,
+            "boxes": rows.stop - rows.start,
+            "min_support": float(support_fraction[rows].min(initial=1.0)),
+            "interlock": float(interlock[rows].mean()) if index and rows.stop > rows.start else 0.0,
+            "column": float(column[rows].mean()) if index and rows.stop > rows.start else 0.0,
+            "max_load": float(load[rows].max(initial=0.0)),
+        })
+    stacked = base > 0
+    return {
+        "support_fraction": support_fraction,
+        "supporters": supporters,
+        "load": load,
+        "pressure": load / footprint,
+        "layers": layers,
+        "summary": {
+            "min_support": float(support_fraction.min(initial=1.0)),
+            "partially_supported": int(np.count_nonzero(support_fraction < 1 - 1e-9)),
+            "interlock": float(interlock[stacked].mean()) if stacked.any() else 0.0,
+            "column": float(column[stacked].mean()) if stacked.any() else 0.0,
+            "max_load": float(load.max(initial=0.0)),
+            "max_pressure": float((load / footprint).max(initial=0.0)),
+        },
+    }
@@ -0,0 +1,193 @@
+"""预计算方案库：把标准托盘上大批箱子尺寸的求解结果离线写入 SQLite，按索引查询
+
+每条记录的键与缓存键相同（托盘尺寸、算法、算法版本、排序后的箱子尺寸），布局以压缩后的
+pickle 保存（层布局拼接的方案只保存去重后的层布局）。箱数、层数和利用率单独成列并建有覆盖索引，
+"某托盘上利用率 ≥ 90% 的全部箱子"之类的范围查询只读索引，不读取布局，也不调用求解器。
+"""
+import itertools
+import logging
+import pickle
+import sqlite3
+import threading
+import zlib
+
+from .batch import BOX_FIELDS, _size, read_rows
+from .cache import MISSING, canonical_key
+from .parallel import ParallelSolver
+from .solver import SOLVER_VERSION, SOLVERS, Box, Pallet, best_layout
+from .trace import span
+
+logger = logging.getLogger("palletizing.store")
+
+# 常用标准托盘（cm）：1200×1000、1200×800（欧标）、1100×1100，最大堆高取页面默认值
+STANDARD_PALLETS = (Pallet(120, 100, 200), Pallet(120, 80, 200), Pallet(110, 110, 200))
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS solutions ("
+    "pallet_l NUMERIC NOT NULL, pallet_w NUMERIC NOT NULL, pallet_h NUMERIC NOT NULL, "
+    "version INTEGER NOT NULL, algorithm TEXT NOT NULL, "
+    "box_a NUMERIC NOT NULL, box_b NUMERIC NOT NULL, box_c NUMERIC NOT NULL, "
+    "total_boxes INTEGER NOT NULL, layers INTEGER NOT NULL, utilization REAL NOT NULL, "
+    "layout BLOB, "
+    "UNIQUE (pallet_l, pallet_w, pallet_h, version, algorithm, box_a, box_b, box_c))",
+    # 范围查询的覆盖索引：查询列都在索引中，不需要回表读取布局
+    "CREATE INDEX IF NOT EXISTS solutions_utilization ON solutions "
+    "(pallet_l, pallet_w, pallet_h, version, algorithm, utilization, total_boxes, layers, box_a, box_b, box_c)",
+)
+
+_KEY = ("pallet_l = ? AND pallet_w = ? AND pallet_h = ? AND version = ? AND algorithm = ? "
+        "AND box_a = ? AND box_b = ? AND box_c = ?")
+
+
+def dump_layout(layout):
+    """把布局序列化为压缩的字节串（无解时为 None）"""
+    if layout is None:
+        return None
+    return zlib.compress(pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_layout(blob):
+    return None if blob is None else pickle.loads(zlib.decompress(blob))
+
+
+def _build_task(task):
+    """子进程求解一个 (箱子, 托盘, 算法) 组合，返回 (总箱数, 层数, 利用率, 序列化布局)"""
+    box_dims, pallet_dims, algorithm = task
+    layout = best_layout(Box(*box_dims), Pallet(*pallet_dims), SOLVERS[algorithm])
+    if layout is None:
+        return 0, 0, 0.0, None
+    return layout["total_boxes"], layout["layers"], layout["utilization"], dump_layout(layout)
+
+
+class SolutionStore:
+    """SQLite 方案库；get 与 LayoutCache 使用相同的缓存键，可作为缓存的只读层"""
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def get(self, key):
+        """按缓存键（canonical_key）取出布局；未收录时返回 MISSING，收录的无解结果返回 None"""
+        dims, pallet_dims, algorithm, version = key
+        with self._lock:
+            row = self._conn.execute(f"SELECT layout FROM solutions WHERE {_KEY}",
+                                     (*pallet_dims, version, algorithm, *dims)).fetchone()
+        return MISSING if row is None else load_layout(row[0])
+
+    def lookup(self, box, pallet, algorithm="improved"):
+        """按箱子和托盘取出布局，摆放方向无关"""
+        return self.get(canonical_key(box, pallet, algorithm))
+
+    def contains(self, key):
+        dims, pallet_dims, algorithm, version = key
+        with self._lock:
+            row = self._conn.execute(f"SELECT 1 FROM solutions WHERE {_KEY}",
+                                     (*pallet_dims, version, algorithm, *dims)).fetchone()
+        return row is not None
+
+    def put_many(self, records):
+        """写入 [(缓存键, (总箱数, 层数, 利用率, 序列化布局))]，同一事务提交"""
+        rows = [(*pallet_dims, version, algorithm, *dims, *result)
+                for (dims, pallet_dims, algorithm, version), result in records]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO solutions (pallet_l, pallet_w, pallet_h, version, algorithm, "
+                "box_a, box_b, box_c, total_boxes, layers, utilization, layout) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def prune(self):
+        """删除旧版本求解器的结果，返回删除的条数"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM solutions WHERE version != ?", (SOLVER_VERSION,)).rowcount
+
+    def query(self, pallet, min_utilization=None, max_utilization=None, min_boxes=None, max_boxes=None,
+              algorithms=("improved", "block"), best=True, limit=None):
+        """范围查询：按利用率从高到低返回托盘上满足条件的箱子
+
+        返回 dict 列表（box, algorithm, total_boxes, layers, utilization），只读取索引列。
+        best 为 True 时每种箱子只保留箱数最多的一种算法（箱数相同时取 algorithms 中靠前者）。
+        """
+        conditions = ["pallet_l = ?", "pallet_w = ?", "pallet_h = ?", "version = ?",
+                      f"algorithm IN ({', '.join('?' * len(algorithms))})", "total_boxes > 0"]
+        params = [pallet.length, pallet.width, pallet.max_height, SOLVER_VERSION, *algorithms]
+        for column, op, value in (("utilization", ">=", min_utilization), ("utilization", "<=", max_utilization),
+                                  ("total_boxes", ">=", min_boxes), ("total_boxes", "<=", max_boxes)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        sql = ("SELECT box_a, box_b, box_c, algorithm, total_boxes, layers, utilization FROM solutions "
+               f"WHERE {' AND '.join(conditions)} ORDER BY utilization DESC, box_a, box_b, box_c")
+        if limit is not None and not best:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        rank = {name: i for i, name in enumerate(algorithms)}
+        if best:
+            # 同一箱子的各算法结果按利用率排在一起（箱子和托盘相同，利用率与箱数成正比）
+            rows.sort(key=lambda row: (-row[6], row[:3], rank[row[3]]))
+            seen = set()
+            rows = [row for row in rows if row[:3] not in seen and not seen.add(row[:3])][:limit]
+        return [
+            {"box": list(row[:3]), "algorithm": row[3], "total_boxes": row[4], "layers": row[5],
+             "utilization": row[6]}
+            for row in rows
+        ]
+
+    def stats(self):
+        """各托盘、各算法收录的条数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pallet_l, pallet_w, pallet_h, algorithm, COUNT(*) FROM solutions "
+                "WHERE version = ? GROUP BY pallet_l, pallet_w, pallet_h, algorithm", (SOLVER_VERSION,)).fetchall()
+        return [{"pallet": list(row[:3]), "algorithm": row[3], "entries": row[4]} for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+def read_boxes(path):
+    """从 CSV / JSONL 清单读取箱子尺寸（box_l, box_w, box_h 列，其余列忽略），无法解析的行记录警告后跳过"""
+    for index, row in enumerate(read_rows(path)):
+        try:
+            yield Box(*(_size(row[k]) for k in BOX_FIELDS))
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.warning("跳过第 %d 行: %s: %s", index + 1, type(exc).__name__, exc)
+
+
+def grid_boxes(minimum, maximum, step=1):
+    """[minimum, maximum] 范围内按 step 取值的全部箱子尺寸（长 ≥ 宽 ≥ 高，不重复）"""
+    count = int((maximum - minimum) // step) + 1
+    values = [minimum + i * step for i in range(count)]
+    return [Box(*dims[::-1]) for dims in itertools.combinations_with_replacement(values, 3)]
+
+
+def build_store(store, boxes, pallets=STANDARD_PALLETS, algorithms=tuple(SOLVERS), workers=1, chunksize=None,
+                block_size=256, trace=None):
+    """预计算：对每个 (箱子, 托盘, 算法) 组合求解并写入方案库，返回新写入的条数
+
+    摆放方向无关的重复箱子只求解一次，方案库中已有（当前算法版本）的组合跳过；
+    每 block_size 个组合分发一次并提交一次事务，中断后重新运行会从断点继续。
+    """
+    store.prune()
+    # 按首次出现的顺序去重
+    pending = {}
+    for box in boxes:
+        for pallet in pallets:
+            for algorithm in algorithms:
+                key = canonical_key(box, pallet, algorithm)
+                if key not in pending and not store.contains(key):
+                    pending[key] = None
+    pending = list(pending)
+    written = 0
+    with ParallelSolver(workers, chunksize) as solver:
+        for start in range(0, len(pending), block_size):
+            block = pending[start:start + block_size]
+            tasks = [(dims, pallet_dims, algorithm) for dims, pallet_dims, algorithm, _ in block]
+            with span(trace, "store.build", tasks=len(tasks)):
+                results = solver.map_tasks(tasks, _build_task)
+                written += store.put_many(zip(block, results))
+    return written
@@ -0,0 +1,92 @@
+"""参数扫描：用 NumPy 广播一次性计算整片尺寸网格上的箱数
+
+原始纵横式算法每层的箱数为 floor(L/l)*floor(W/w)（奇数层交换 l、w），
+因此整片网格的箱数可以直接向量化计算；再只对排名靠前的候选调用改进算法精算。
+"""
+import numpy as np
+
+from .cache import canonical_box
+from .solver import Box, Pallet, best_layout, calculate_alternating_layout
+
+
+def _rotations(box_l, box_w, box_h):
+    """与 Box.get_rotations 相同顺序的 6 种摆放方向（支持数组）"""
+    return [
+        (box_l, box_w, box_h),
+        (box_w, box_l, box_h),
+        (box_l, box_h, box_w),
+        (box_h, box_l, box_w),
+        (box_w, box_h, box_l),
+        (box_h, box_w, box_l),
+    ]
+
+
+def alternating_counts(box_l, box_w, box_h, pallet_l, pallet_w, pallet_h):
+    """原始纵横式算法的总箱数（所有摆放方向取最大），参数可为任意可广播的数组"""
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float)
+                                   for v in (box_l, box_w, box_h, pallet_l, pallet_w, pallet_h)))
+    box_l, box_w, box_h, pallet_l, pallet_w, pallet_h = arrays
+    best = np.zeros(box_l.shape, dtype=np.int64)
+    for l, w, h in _rotations(box_l, box_w, box_h):
+        # 偶数层按 (l, w) 排列，奇数层旋转 90°；某层放不下时堆码终止
+        even = np.floor(pallet_l / l) * np.floor(pallet_w / w)
+        odd = np.floor(pallet_l / w) * np.floor(pallet_w / l)
+        layers = np.floor(pallet_h / h)
+        total = np.where(
+            odd > 0,
+            np.ceil(layers / 2) * even + np.floor(layers / 2) * odd,
+            np.minimum(layers, 1) * even,
+        )
+        best = np.maximum(best, np.where(even > 0, total, 0).astype(np.int64))
+    return best
+
+
+def sweep_pallet(box, lengths, widths, max_height, refine=5):
+    """扫描托盘长宽：返回 (箱数矩阵[len(lengths), len(widths)], 精算结果列表)
+
+    精算结果为 [(托盘长, 托盘宽, 原始算法箱数, 改进算法布局)]，按箱数从高到低排列。
+    """
+    lengths = np.asarray(lengths)
+    widths = np.asarray(widths)
+    grid = alternating_counts(box.length, box.width, box.height,
+                              lengths[:, None], widths[None, :], max_height)
+    refined = []
+    for i, j in _top_cells(grid, refine):
+        pallet = Pallet(lengths[i].item(), widths[j].item(), max_height)
+        layout = best_layout(canonical_box(box), pallet, calculate_alternating_layout)
+        refined.append((pallet.length, pallet.width, int(grid[i, j]), layout))
+    refined.sort(key=lambda item: -(item[3]["total_boxes"] if item[3] else item[2]))
+    return grid, refined
+
+
+def sweep_box(box, pallet, delta=2, step=1, refine=5):
+    """在箱子各边 ±delta 范围内扫描尺寸：返回 (偏移量, 箱数立方体[len, len, len], 精算结果列表)
+
+    箱数立方体的三个轴分别对应长、宽、高的偏移；精算结果为
+    [((长, 宽, 高), 原始算法箱数, 改进算法布局)]，按箱数从高到低排列。
+    """
+    offsets = np.arange(-delta, delta + step / 2, step)
+    if all(isinstance(v, (int, np.integer)) for v in (delta, step)):
+        offsets = offsets.astype(np.int64)
+    box_l = box.length + offsets[:, None, None]
+    box_w = box.width + offsets[None, :, None]
+    box_h = box.height + offsets[None, None, :]
+    valid = (box_l > 0) & (box_w > 0) & (box_h > 0)
+    grid = np.where(valid, alternating_counts(np.where(valid, box_l, 1), np.where(valid, box_w, 1),
+                                              np.where(valid, box_h, 1), pallet.length, pallet.width,
+                                              pallet.max_height), 0)
+    refined = []
+    for i, j, k in _top_cells(grid, refine):
+        dims = (box.length + offsets[i].item(), box.width + offsets[j].item(), box.height + offsets[k].item())
+        layout = best_layout(canonical_box(Box(*dims)), pallet, calculate_alternating_layout)
+        refined.append((dims, int(grid[i, j, k]), layout))
+    refined.sort(key=lambda item: -(item[2]["total_boxes"] if item[2] else item[1]))
+    return offsets, grid, refined
+
+
+def _top_cells(grid, count):
+    """箱数最多的 count 个网格下标"""
+    if count <= 0 or grid.size == 0:
+        return []
+    flat = np.argsort(-grid, axis=None, kind="stable")[:count]
+    return [tuple(int(i) for i in np.unravel_index(index, grid.shape)) for index in flat]
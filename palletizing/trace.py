@@ -0,0 +1,101 @@
+"""分阶段耗时追踪：用上下文管理器记录各阶段耗时，汇总为单次请求的追踪记录
+
+    trace = Trace("main")
+    with trace.span("solve", algorithm="improved"):
+        ...
+    trace.emit()   # 以 JSON 写入日志 palletizing.trace
+
+可选的性能剖析（cProfile 或 pyinstrument）通过 Trace(profile=...) 或环境变量
+PALLETIZE_PROFILE 开启，剖析报告保存在 trace.profile_report。
+"""
+import io
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger("palletizing.trace")
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class Trace:
+    """单次请求的追踪记录，spans 按开始顺序保存，depth 表示嵌套层级"""
+    def __init__(self, name="request", profile=None):
+        self.name = name
+        self.spans = []
+        self.profile = profile if profile is not None else os.environ.get("PALLETIZE_PROFILE") or None
+        if self.profile and self.profile not in PROFILERS:
+            raise ValueError(f"未知的剖析器: {self.profile}，可选 {PROFILERS}")
+        self.profile_report = None
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """记录一个阶段的耗时，可嵌套"""
+        record = {"name": name, "depth": self._depth,
+                  "start_ms": (time.perf_counter() - self._start) * 1000}
+        record.update(attrs)
+        self.spans.append(record)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["duration_ms"] = (time.perf_counter() - start) * 1000
+            self._depth -= 1
+
+    @contextmanager
+    def profiled(self):
+        """在开启剖析时对代码块做性能剖析，否则不做任何事"""
+        if self.profile == "cprofile":
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+                self.profile_report = out.getvalue()
+        elif self.profile == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                self.profile_report = profiler.output_text()
+        else:
+            yield
+
+    def total_ms(self, name):
+        """某一名称的所有阶段耗时之和"""
+        return sum(s.get("duration_ms", 0.0) for s in self.spans if s["name"] == name)
+
+    def to_dict(self):
+        return {
+            "trace": self.name,
+            "elapsed_ms": (time.perf_counter() - self._start) * 1000,
+            "spans": self.spans,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+
+    def emit(self, level=logging.INFO):
+        """以一行 JSON 写入日志"""
+        if logger.isEnabledFor(level):
+            logger.log(level, self.to_json())
+
+
+def span(trace, name, **attrs):
+    """trace 为 None 时返回空上下文，便于在可选追踪的函数中使用"""
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, **attrs)
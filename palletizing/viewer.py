@@ -0,0 +1,81 @@
+"""交互式 3D 视图：把布局打包为二进制缓冲区，嵌入自包含的 WebGL2 页面（static/viewer.html）
+
+每个箱子 6 个 float32（x, y, z, l, w, h）和 1 个 uint8 类型编码，base64 后嵌入页面；
+页面用实例化绘制一次画出所有箱子，旋转、缩放和按层剥离都在浏览器中完成，
+不需要服务端重绘，也不依赖任何外部脚本，可离线打开。
+"""
+import base64
+import json
+import os
+
+import numpy as np
+
+VIEWER_TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "viewer.html")
+
+# 页面模板中的数据占位符
+DATA_PLACEHOLDER = "/*LAYOUT_DATA*/null"
+
+# 与静态 3D 图相同的配色
+DEFAULT_COLORS = {
+    "main": "#4ECDC4",
+    "extra_x": "#4ECDC4",
+    "extra_x_rot": "#A7C957",
+    "extra_y": "#4ECDC4",
+    "extra_y_rot": "#BDD5EA",
+    "block": "#4ECDC4",
+    "block_rot": "#F4A261",
+}
+
+# 其余类型（混装堆码的 SKU）按出现顺序使用 matplotlib tab20 配色
+SKU_PALETTE = (
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896",
+    "#9467bd", "#c5b0d5", "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7",
+    "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+)
+
+
+def used_types(layout):
+    """布局中实际出现的类型名，按首次出现的顺序"""
+    codes, first = np.unique(layout.type_codes, return_index=True)
+    return [layout.type_names[code] for code in codes[np.argsort(first)]]
+
+
+def type_colors(layout, colors=None):
+    """布局类型表中每种类型的颜色；SKU 按在布局中出现的顺序分配调色板颜色"""
+    colors = dict(DEFAULT_COLORS, **(colors or {}))
+    skus = [name for name in used_types(layout) if name not in colors]
+    colors.update({sku: SKU_PALETTE[i % len(SKU_PALETTE)] for i, sku in enumerate(skus)})
+    return [colors.get(name, DEFAULT_COLORS["main"]) for name in layout.type_names]
+
+
+def layout_buffers(layout):
+    """返回 (箱子缓冲区, 类型缓冲区)：(N, 6) float32 的 x, y, z, l, w, h 和 N 个 uint8 类型编码"""
+    boxes = np.empty((layout.box_count, 6), dtype="<f4")
+    for i, name in enumerate(("x", "y", "z", "l", "w", "h")):
+        boxes[:, i] = layout.columns[name]
+    return boxes.tobytes(), layout.type_codes.astype(np.uint8).tobytes()
+
+
+def viewer_payload(pallet, layout, colors=None):
+    """页面所需的全部数据（可 JSON 序列化）"""
+    boxes, types = layout_buffers(layout)
+    return {
+        "pallet": [float(pallet.length), float(pallet.width), float(pallet.max_height)],
+        "boxes": base64.b64encode(boxes).decode("ascii"),
+        "types": base64.b64encode(types).decode("ascii"),
+        "colors": type_colors(layout, colors),
+        "type_names": list(layout.type_names),
+        # 图例只列出 SKU（混装堆码），单一箱型的布局类型不需要图例
+        "legend": [name for name in used_types(layout) if name not in DEFAULT_COLORS],
+        "layer_offsets": layout.layer_offsets.tolist(),
+        "summary": {key: layout.summary.get(key) for key in ("type", "total_boxes", "layers", "utilization")},
+    }
+
+
+def viewer_html(pallet, layout, colors=None):
+    """生成自包含的交互式 3D 视图页面（字符串），colors 可覆盖类型颜色"""
+    with open(VIEWER_TEMPLATE, encoding="utf-8") as f:
+        template = f.read()
+    data = json.dumps(viewer_payload(pallet, layout, colors), ensure_ascii=False)
+    # 防止 SKU 名称中的 "</script>" 提前结束脚本
+    return template.replace(DATA_PLACEHOLDER, data.replace("</", "<\\/"))
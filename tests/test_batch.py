@@ -0,0 +1,64 @@
+import json
+import sqlite3
+
+import pytest
+
+from palletizing import LayoutCache, solve_batch
+from palletizing.__main__ import main
+
+ROWS = [
+    {"id": i, "box_l": l, "box_w": w, "box_h": h, "pallet_l": 120, "pallet_w": 100, "pallet_h": 180}
+    for i, (l, w, h) in enumerate([(20, 35, 40), (40, 20, 35), (30, 25, 20), (43, 34, 58), (130, 10, 10)])
+]
+
+
+def _solve(path, workers):
+    cache = LayoutCache(path=str(path))
+    records = list(solve_batch(ROWS, workers=workers, cache=cache))
+    cache.disk.close()
+    return records, cache.stats()
+
+
+def test_parallel_run_fills_disk_cache(tmp_path):
+    db = tmp_path / "cache.db"
+    first, stats = _solve(db, workers=2)
+    assert stats["misses"] and not stats["disk_hits"]
+    entries = sqlite3.connect(db).execute("SELECT COUNT(*) FROM layouts").fetchone()[0]
+    assert entries == stats["misses"]
+
+    # 第二次运行全部命中磁盘缓存，结果与串行求解一致
+    second, stats = _solve(db, workers=2)
+    assert stats["misses"] == 0 and stats["disk_hits"] == entries
+    assert first == second == list(solve_batch(ROWS))
+
+
+def test_cli_parallel_cache(tmp_path):
+    catalog = tmp_path / "catalog.jsonl"
+    catalog.write_text("".join(json.dumps(row) + "\n" for row in ROWS), encoding="utf-8")
+    db = tmp_path / "cache.db"
+    for output in ("a.jsonl", "b.jsonl"):
+        main(["solve", str(catalog), "-j", "2", "--cache", str(db), "-o", str(tmp_path / output)])
+    assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM layouts").fetchone()[0] > 0
+    assert (tmp_path / "a.jsonl").read_text() == (tmp_path / "b.jsonl").read_text()
+
+
+BAD_ROWS = [
+    {"id": "zero", "box_l": 0, "box_w": 10, "box_h": 10, "pallet_l": 120, "pallet_w": 100, "pallet_h": 200},
+    {"id": "negative", "box_l": -5, "box_w": 10, "box_h": 10, "pallet_l": 120, "pallet_w": 100, "pallet_h": 200},
+    {"id": "pallet", "box_l": 20, "box_w": 35, "box_h": 40, "pallet_l": 120, "pallet_w": 100, "pallet_h": 0},
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_non_positive_sizes_become_error_records(workers):
+    records = list(solve_batch(BAD_ROWS + ROWS[:1], workers=workers))
+    assert [record["id"] for record in records] == ["zero", "negative", "pallet", 0]
+    assert all(record["error"].startswith("ValueError") for record in records[:3])
+    assert "error" not in records[3]
+
+
+def test_cli_rejects_non_positive_sizes(tmp_path):
+    with pytest.raises(SystemExit, match="尺寸必须为正数"):
+        main(["view", "--box", "0", "10", "10", "--pallet", "120", "100", "200", "-o", str(tmp_path / "v.html")])
+    with pytest.raises(SystemExit, match="尺寸必须为正数"):
+        main(["plan", "--box", "20", "35", "40", "--pallet", "120", "100", "-5", "--quantity", "10"])
@@ -0,0 +1,47 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from palletizing import Box, Layout, Pallet, calculate_alternating_layout, calculate_block_layout
+from palletizing.layout import COLUMNS, StampedLayout
+
+CASES = [(calculate_alternating_layout, (20, 35, 40), (120, 100, 200), (20, 40, 35)),
+         (calculate_alternating_layout, (27, 33, 21), (120, 80, 160), (27, 33, 21)),
+         (calculate_block_layout, (43, 34, 58), (120, 100, 200), (43, 34, 58))]
+
+
+def _materialized(layout):
+    """按列数据构造的普通 Layout"""
+    return Layout(layout.summary, layout.columns, layout.type_codes, layout.type_names,
+                  layout.layer_offsets, layout.layer_orientations)
+
+
+@pytest.mark.parametrize("solver, box_dims, pallet_dims, orientation", CASES)
+def test_stamped_layout_is_lazy(solver, box_dims, pallet_dims, orientation):
+    layout = solver(Box(*box_dims), Pallet(*pallet_dims), orientation)
+    assert isinstance(layout, StampedLayout)
+    # 汇总、箱数和层下标不需要生成列数据
+    assert layout["total_boxes"] == layout.box_count and layout.layer_count == layout["layers"]
+    assert "_stamped" not in layout.__dict__
+    layout.columns
+    assert "_stamped" in layout.__dict__
+    # 序列化时不保存列数据，反序列化后结果相同
+    restored = pickle.loads(pickle.dumps(layout))
+    assert "_stamped" not in restored.__dict__
+    assert all(np.array_equal(restored.columns[name], layout.columns[name]) for name in COLUMNS)
+
+
+@pytest.mark.parametrize("solver, box_dims, pallet_dims, orientation", CASES)
+def test_stamped_layout_matches_materialized(solver, box_dims, pallet_dims, orientation):
+    layout = solver(Box(*box_dims), Pallet(*pallet_dims), orientation)
+    plain = _materialized(layout)
+    stamped_ids, stamped_groups = layout.layer_patterns()
+    plain_ids, plain_groups = plain.layer_patterns()
+    assert stamped_ids.tolist() == plain_ids.tolist() and stamped_groups == plain_groups
+    for count in (0, 1, layout.layer_offsets[1], layout.box_count // 2, layout.box_count, layout.box_count + 5):
+        stamped, expected = layout.head(count), plain.head(count)
+        assert stamped.summary == expected.summary
+        assert stamped.layer_offsets.tolist() == expected.layer_offsets.tolist()
+        assert all(np.array_equal(stamped.columns[name], expected.columns[name]) for name in COLUMNS)
+        assert stamped.to_dict() == expected.to_dict()
@@ -0,0 +1,17 @@
+import random
+
+from palletizing import Box, Item, Pallet, analyze_stability, calculate_mixed_layout
+
+
+def test_mixed_layout_is_supported_and_inside_pallet():
+    random.seed(7)
+    items = [Item(Box(round(random.uniform(10, 40), 1), round(random.uniform(10, 40), 1), random.choice([10, 15])),
+                  random.randint(5, 30), f"S{i}") for i in range(12)]
+    pallet = Pallet(120, 100, 150)
+    layout, _ = calculate_mixed_layout(items, pallet)
+    columns = layout.columns
+    assert (columns["x"] + columns["l"] <= pallet.length + 1e-9).all()
+    assert (columns["y"] + columns["w"] <= pallet.width + 1e-9).all()
+    assert (columns["z"] + columns["h"] <= pallet.max_height + 1e-9).all()
+    # 完全支撑且不重叠：每个箱子的底面支撑比例都为 1
+    assert analyze_stability(layout)["summary"]["min_support"] > 1 - 1e-9
@@ -0,0 +1,17 @@
+import itertools
+
+from palletizing import packing
+from palletizing.packing import _pack, pack_layer
+
+
+def test_default_budget_does_not_depend_on_the_clock(monkeypatch):
+    """默认按节点数限制搜索：机器再慢，结果也与正常运行相同"""
+    cases = [(11, 17, 120, 80), (25, 16, 120, 110), (5, 7, 240, 200), (30.5, 20, 120, 80)]
+    _pack.cache_clear()
+    expected = [pack_layer(*case) for case in cases]
+
+    clock = itertools.count(step=10.0)
+    monkeypatch.setattr(packing.time, "perf_counter", lambda: next(clock))
+    _pack.cache_clear()
+    assert [pack_layer(*case) for case in cases] == expected
+    _pack.cache_clear()
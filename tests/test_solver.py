@@ -0,0 +1,40 @@
+import itertools
+import math
+
+import pytest
+
+from palletizing import SOLVERS, Box, Pallet, best_layout, calculate_alternating_layout
+
+BOXES = [(20, 35, 40), (10, 12, 15), (27, 33, 21), (30.5, 20, 15), (110, 95, 60), (43, 34, 58)]
+PALLETS = [(120, 100, 200), (120, 80, 160), (110, 110, 180)]
+
+
+@pytest.mark.parametrize("name", list(SOLVERS))
+@pytest.mark.parametrize("box_dims, pallet_dims", list(itertools.product(BOXES, PALLETS)))
+def test_total_boxes_are_real_cartons(name, box_dims, pallet_dims):
+    """每个计数的箱子都是真实箱子：总箱数 × 单箱体积 = 总体积"""
+    box, pallet = Box(*box_dims), Pallet(*pallet_dims)
+    for orientation in box.get_rotations():
+        layout = SOLVERS[name](box, pallet, orientation)
+        if layout is None:
+            continue
+        l, w, h = orientation
+        assert layout["total_boxes"] == layout.box_count
+        assert math.isclose(layout["total_boxes"] * l * w * h, layout["total_volume"], rel_tol=1e-9)
+        footprints = {(l, w), (w, l)}
+        assert set(zip(layout.columns["l"].tolist(), layout.columns["w"].tolist())) <= footprints
+
+
+def test_extra_pieces_use_carton_footprint():
+    layout = calculate_alternating_layout(Box(20, 35, 40), Pallet(120, 100, 200), (20, 40, 35))
+    assert layout["total_boxes"] == 75
+    assert best_layout(Box(20, 35, 40), Pallet(120, 100, 200), calculate_alternating_layout)["total_boxes"] == 75
+
+
+@pytest.mark.parametrize("name", list(SOLVERS))
+@pytest.mark.parametrize("box_dims, pallet_dims", [((0, 10, 10), (120, 100, 200)), ((-5, 10, 10), (120, 100, 200)),
+                                                    ((20, 35, 40), (120, 0, 200)), ((20, 35, 40), (120, 100, -1))])
+def test_non_positive_sizes_have_no_layout(name, box_dims, pallet_dims):
+    box, pallet = Box(*box_dims), Pallet(*pallet_dims)
+    assert all(SOLVERS[name](box, pallet, orientation) is None for orientation in box.get_rotations())
+    assert best_layout(box, pallet, SOLVERS[name]) is None
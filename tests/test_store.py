@@ -0,0 +1,69 @@
+import pytest
+
+from palletizing import Box, Pallet, SolutionStore, best_layout, build_store
+from palletizing.cache import MISSING, canonical_box, canonical_key
+from palletizing.solver import SOLVER_VERSION, SOLVERS
+
+PALLET = Pallet(120, 100, 200)
+BOXES = [Box(20, 35, 40), Box(40, 20, 35), Box(10, 12, 15), Box(27, 33, 21), Box(43, 34, 58), Box(130, 10, 10)]
+ALGORITHMS = ("improved", "block")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SolutionStore(str(tmp_path / "store.db"))
+    yield store
+    store.close()
+
+
+def _expected(box, algorithm):
+    return best_layout(canonical_box(box), PALLET, SOLVERS[algorithm])
+
+
+def test_build_skips_duplicates_and_resumes(store):
+    # 前两个箱子只是摆放方向不同，只求解一次
+    assert build_store(store, BOXES[:3], [PALLET], ALGORITHMS) == 2 * len(ALGORITHMS)
+    assert build_store(store, BOXES, [PALLET], ALGORITHMS, block_size=3) == 3 * len(ALGORITHMS)
+    assert build_store(store, BOXES, [PALLET], ALGORITHMS) == 0
+    for box in BOXES:
+        for algorithm in ALGORITHMS:
+            layout, expected = store.lookup(box, PALLET, algorithm), _expected(box, algorithm)
+            if expected is None:
+                assert layout is None
+            else:
+                assert layout["total_boxes"] == expected["total_boxes"]
+                assert layout.to_dict() == expected.to_dict()
+
+
+def test_query_matches_brute_force(store):
+    build_store(store, BOXES, [PALLET], ALGORITHMS)
+    best = {}
+    for box in BOXES:
+        dims = sorted((box.length, box.width, box.height))
+        for algorithm in ALGORITHMS:
+            layout = _expected(box, algorithm)
+            if layout and (tuple(dims) not in best or layout["total_boxes"] > best[tuple(dims)]["total_boxes"]):
+                best[tuple(dims)] = {"box": dims, "algorithm": algorithm, "total_boxes": layout["total_boxes"],
+                                     "layers": layout["layers"], "utilization": layout["utilization"]}
+    rows = store.query(PALLET, min_utilization=0.5, algorithms=ALGORITHMS)
+    expected = sorted((row for row in best.values() if row["utilization"] >= 0.5),
+                      key=lambda row: (-row["utilization"], row["box"]))
+    assert rows == expected
+    assert store.query(PALLET, min_utilization=0.5, algorithms=ALGORITHMS, limit=1) == expected[:1]
+    # 每种算法各一行时，箱数范围同样生效
+    rows = store.query(PALLET, min_boxes=100, max_boxes=1000, algorithms=ALGORITHMS, best=False)
+    assert rows and all(100 <= row["total_boxes"] <= 1000 for row in rows)
+    assert [row["utilization"] for row in rows] == sorted((row["utilization"] for row in rows), reverse=True)
+
+
+def test_old_solver_version_is_ignored_and_pruned(store):
+    box = BOXES[0]
+    key = canonical_key(box, PALLET, "improved")
+    stale = (*key[:3], SOLVER_VERSION - 1)
+    store.put_many([(stale, (1, 1, 0.99, None))])
+    assert store.get(stale) is None and store.contains(stale)
+    assert not store.contains(key) and store.lookup(box, PALLET) is MISSING
+    assert store.query(PALLET, algorithms=("improved",)) == []
+    assert build_store(store, [box], [PALLET], ("improved",)) == 1
+    assert not store.contains(stale)
+    assert store.lookup(box, PALLET)["total_boxes"] == _expected(box, "improved")["total_boxes"]
@@ -0,0 +1,26 @@
+import itertools
+
+import numpy as np
+
+from palletizing import Box, Pallet, best_layout, calculate_alternating_layout_original
+from palletizing.sweep import alternating_counts
+
+
+def _original(box_dims, pallet_dims):
+    layout = best_layout(Box(*box_dims), Pallet(*pallet_dims), calculate_alternating_layout_original)
+    return 0 if layout is None else layout["total_boxes"]
+
+
+def test_alternating_counts_match_original_solver():
+    boxes = [(20, 35, 40), (10, 12, 15), (27, 33, 21), (30.5, 20, 15), (110, 95, 60), (130, 10, 10), (250, 20, 20)]
+    pallets = [(120, 100, 200), (120, 80, 160), (110, 110, 180), (100, 125, 30)]
+    for box_dims, pallet_dims in itertools.product(boxes, pallets):
+        assert alternating_counts(*box_dims, *pallet_dims) == _original(box_dims, pallet_dims)
+
+
+def test_alternating_counts_broadcast_over_pallet_grid():
+    lengths, widths = np.arange(90, 131, 5), np.arange(70, 121, 5)
+    grid = alternating_counts(20, 35, 40, lengths[:, None], widths[None, :], 200)
+    assert grid.shape == (len(lengths), len(widths))
+    for (i, length), (j, width) in itertools.product(enumerate(lengths), enumerate(widths)):
+        assert grid[i, j] == _original((20, 35, 40), (int(length), int(width), 200))